@@ -0,0 +1,257 @@
+import os
+# Headless: the dummy drivers have to be chosen before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+import numpy as np
+import pygame
+from CardDeck.cardFile import Cards, Standard_Cards, CARD_FRONT_PATH
+from CardDeck.cardStore import CardStore
+from CardDeck.cardInput import InputDispatcher
+from CardDeck.cardLayout import fan_angles
+from CardDeck.cardAnimation import AnimationScheduler, FlipTween
+from CardDeck.cardFactory import DeckFactory
+from CardDeck.cardModel import CardModel
+from Container.rngService import RngService
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+DEFAULT_SIZES = (2, 104, 1000, 10_000)
+SCREEN_SIZE = (1280, 720)
+CARD_SCALE = (100, 125)
+DT = 1 / 120
+# a baseline from a machine that differs in any of these only says roughly where the numbers should be
+ENVIRONMENT_KEYS = ("cpu", "cpu_count", "machine", "python", "pygame", "numpy")
+
+def cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as file:
+            for line in file:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+def environment() -> Dict[str, object]:
+    """What the timings depend on besides the code, stored with every result"""
+    return {
+        "cpu": cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+def environment_differences(current: dict, baseline: dict) -> List[str]:
+    return [f"{key}: {baseline.get(key)} -> {current.get(key)}" for key in ENVIRONMENT_KEYS if current.get(key) != baseline.get(key)]
+
+def measure(run: Callable[[], None], repeat: int) -> List[float]:
+    """Wall time in ms of `repeat` runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def make_cards(count: int, seed: int = 0) -> List[Cards]:
+    """`count` cards spread over the screen in their own store, like a dealt board"""
+    store = CardStore(capacity=count)
+    rng = RngService(seed)
+    width, height = SCREEN_SIZE
+    columns = max(1, int(count ** 0.5 * width / height))
+    cards = []
+    for i in range(count):
+        position = (50 + (i % columns) * (width - 100) / columns, 60 + (i // columns) * (height - 120) / max(1, count // columns))
+        cards.append(Cards(position=position, scale=CARD_SCALE, face_image=str(CARD_FRONT_PATH), store=store, rng=rng))
+    return cards
+
+def mouse_events(count: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    points = rng.integers((0, 0), SCREEN_SIZE, size=(count, 2))
+    events = [pygame.event.Event(pygame.MOUSEMOTION, pos=tuple(map(int, point)), rel=(1, 1), buttons=(0, 0, 0)) for point in points]
+    # A press and a release on the board, with motion in between
+    events.insert(0, pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=tuple(map(int, points[0])), button=1))
+    events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=tuple(map(int, points[-1])), button=1))
+    return events
+
+def bench_size(count: int, repeat: int, screen: pygame.Surface) -> Dict[str, List[float]]:
+    results: Dict[str, List[float]] = {}
+    # deck construction
+    results["deck_cards"] = measure(lambda: [card.release() for card in make_cards(count)], repeat)
+    results["deck_models"] = measure(lambda: [CardModel.random() for _ in range(count)], repeat)
+    results["deck_factory"] = measure(lambda: DeckFactory(0).generate(count), repeat)
+    cards = make_cards(count)
+    # face rendering from scratch
+    results["create_card_surface"] = measure(lambda: [card._create_card_surface() for card in cards], repeat)
+    # drawing, the first round fills the face and rotation caches
+    draw_all = lambda: [card.draw(screen) for card in cards]
+    draw_all()
+    results["draw"] = measure(draw_all, repeat)
+    angles = fan_angles(count)
+    for card, angle in zip(cards, angles):
+        card.set_rotation(angle, smooth=False)
+    draw_all()
+    results["draw_rotated"] = measure(draw_all, repeat)
+    # every card drawn mid-flip, the squashed frames are built in the first round and only blitted after that
+    for card in cards:
+        card.is_flipping, card.flip_progress = True, 0.3
+    draw_all()
+    results["draw_flipping"] = measure(draw_all, repeat)
+    for card in cards:
+        card.is_flipping = False
+    # the whole board flipped at once through the scheduler and drawn every step, like turning a deck over
+    flipper = AnimationScheduler()
+    def flip_deck():
+        flipper.start_batch(FlipTween(card, 0.2) for card in cards)
+        while len(flipper):
+            flipper.tick(DT)
+            draw_all()
+    flip_deck()
+    results["flip_deck"] = measure(flip_deck, repeat)
+    # updates: one fixed step per card through the view, and the whole store in one call
+    for card in cards:
+        card.set_position(card.x + 40, card.y + 30)
+    results["update"] = measure(lambda: [card.update(DT) for card in cards], repeat)
+    results["store_step"] = measure(lambda: cards[0].store.step(DT), repeat)
+    # animations: the whole board dealt at once and stepped until every tween retired
+    scheduler = AnimationScheduler()
+    placements = [(card.x, card.y, card.angle) for card in cards]
+    def deal():
+        scheduler.deal(cards, placements, stagger=0.0)
+        while len(scheduler):
+            scheduler.tick(DT)
+    results["animation_deal"] = measure(deal, repeat)
+    # input: every card handles every event (legacy fan-out) against the spatial hash dispatcher
+    events = mouse_events(100)
+    def fan_out():
+        for event in events:
+            for card in cards:
+                card.handle_event(event)
+    results["handle_event_fan_out"] = measure(fan_out, repeat)
+    dispatcher = InputDispatcher(cards)
+    results["input_dispatch"] = measure(lambda: dispatcher.dispatch(events), repeat)
+    # icon and text rendering
+    renderer = Standard_Cards.load_icon_renderer()
+    canvas = pygame.Surface(CARD_SCALE, pygame.SRCALPHA)
+    def icon_text():
+        for card in cards:
+            renderer.draw_Icon_and_Number('\uf004', pygame.Color("red"), canvas, (15, 15), card.health)
+            renderer.draw_words(pygame.Color("white"), canvas, (20, 60), card.card_type)
+    results["icon_text"] = measure(icon_text, repeat)
+    for card in cards:
+        card.release()
+    return results
+
+def summarize(timings: List[float], count: int) -> Dict[str, float]:
+    median = statistics.median(timings)
+    return {"median_ms": round(median, 4), "min_ms": round(min(timings), 4), "per_card_us": round(median * 1000 / count, 4)}
+
+def run(sizes=DEFAULT_SIZES, repeat: int = 5) -> dict:
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    results = {}
+    for count in sizes:
+        start = time.perf_counter()
+        for name, timings in bench_size(count, repeat, screen).items():
+            results[f"{name}[{count}]"] = summarize(timings, count)
+        print(f"{count} cards done in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    pygame.quit()
+    return {
+        "meta": {
+            **environment(),
+            "repeat": repeat,
+            "sizes": list(sizes),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+def spread(result: dict) -> float:
+    """Relative distance between the median and the fastest run, how noisy a measurement was"""
+    return (result["median_ms"] - result["min_ms"]) / result["median_ms"] if result["median_ms"] > 0 else 0.0
+
+def compare(current: dict, baseline: dict, threshold: float = 0.25, min_delta_ms: float = 0.2, strict: bool = False) -> List[dict]:
+    """Benchmarks whose median moved by more than the tolerance relative to the baseline, plus benchmarks
+    the baseline has no entry for ("new") and baseline entries of the sizes run that were not measured ("missing").
+    The tolerance is `threshold` plus the spread of both measurements, changes below `min_delta_ms` are
+    timer noise on the tiny boards and are ignored. A baseline recorded in another environment (see
+    ENVIRONMENT_KEYS) is informational: slower results are reported as "slower", not as regressions, unless `strict`."""
+    informational = bool(environment_differences(current["meta"], baseline["meta"])) and not strict
+    changes = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            changes.append({"name": name, "status": "new", "current_ms": result["median_ms"], "regression": False})
+            continue
+        if reference["median_ms"] <= 0:
+            continue
+        ratio = result["median_ms"] / reference["median_ms"]
+        if abs(result["median_ms"] - reference["median_ms"]) < min_delta_ms:
+            continue
+        tolerance = threshold + spread(result) + spread(reference)
+        if ratio > 1 + tolerance or ratio < 1 / (1 + tolerance):
+            slower = ratio > 1
+            status = ("slower" if informational else "regression") if slower else "improved"
+            changes.append({"name": name, "status": status, "baseline_ms": reference["median_ms"], "current_ms": result["median_ms"],
+                            "ratio": round(ratio, 3), "tolerance": round(tolerance, 3), "regression": slower and not informational})
+    sizes = {f"[{count}]" for count in current["meta"]["sizes"]}
+    for name, reference in baseline["results"].items():
+        if name not in current["results"] and name[name.index("["):] in sizes:
+            changes.append({"name": name, "status": "missing", "baseline_ms": reference["median_ms"], "regression": False})
+    return changes
+
+def print_results(data: dict):
+    for name, result in data["results"].items():
+        print(f"{name:<32} {result['median_ms']:>12.3f} ms {result['per_card_us']:>12.3f} us/card")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmarks of the card rendering, update and input hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="card counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark, the median is reported")
+    parser.add_argument("--output", default=None, help="write the results JSON here")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative change that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.2, help="smaller absolute changes are ignored as noise")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--strict", action="store_true", help="fail on regressions even if the baseline was recorded in another environment")
+    args = parser.parse_args()
+    data = run(args.sizes, args.repeat)
+    print_results(data)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(data, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(data, file, indent=2)
+        print(f"baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        differences = environment_differences(data["meta"], baseline["meta"])
+        if differences:
+            print(f"baseline recorded in another environment ({', '.join(differences)}), "
+                  + ("comparing strictly" if args.strict else "slower results are informational"))
+        changes = compare(data, baseline, args.threshold, args.min_delta_ms, args.strict)
+        for change in changes:
+            if change["status"] == "new":
+                print(f"{'new':<10} {change['name']:<32} {change['current_ms']:.3f} ms, not in the baseline (run with --save-baseline)")
+            elif change["status"] == "missing":
+                print(f"{'missing':<10} {change['name']:<32} in the baseline ({change['baseline_ms']:.3f} ms) but not measured")
+            else:
+                label = "REGRESSION" if change["regression"] else change["status"]
+                print(f"{label:<10} {change['name']:<32} {change['baseline_ms']:.3f} ms -> {change['current_ms']:.3f} ms "
+                      f"(x{change['ratio']}, tolerance {change['tolerance']:.0%})")
+        if any(change["regression"] for change in changes):
+            sys.exit(1)
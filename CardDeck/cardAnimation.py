@@ -0,0 +1,341 @@
+import heapq
+import itertools
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from CardDeck.cardStore import ANIMATION_CODES
+
+Placement = Tuple[float, float, float]  # x, y, angle
+
+def linear(t: float) -> float:
+    return t
+
+def ease_in_quad(t: float) -> float:
+    return t * t
+
+def ease_out_quad(t: float) -> float:
+    return 1 - (1 - t) * (1 - t)
+
+def ease_in_out_quad(t: float) -> float:
+    return 2 * t * t if t < 0.5 else 1 - (-2 * t + 2) ** 2 / 2
+
+def ease_out_cubic(t: float) -> float:
+    return 1 - (1 - t) ** 3
+
+def ease_in_out_sine(t: float) -> float:
+    return 0.5 - math.cos(math.pi * t) / 2
+
+def ease_out_back(t: float) -> float:
+    # Overshoots a little before settling, for cards landing on the table
+    return 1 + 2.70158 * (t - 1) ** 3 + 1.70158 * (t - 1) ** 2
+
+EASINGS: Dict[str, Callable[[float], float]] = {
+    "linear": linear,
+    "ease_in_quad": ease_in_quad,
+    "ease_out_quad": ease_out_quad,
+    "ease_in_out_quad": ease_in_out_quad,
+    "ease_out_cubic": ease_out_cubic,
+    "ease_in_out_sine": ease_in_out_sine,
+    "ease_out_back": ease_out_back,
+}
+
+class Tween:
+    """One animated channel of one card. The target is anything with a CardStore slot (Cards, CardAnimator).
+    A card runs at most one tween per channel, a new one replaces the running one."""
+    channel = ""
+
+    def __init__(self, target, duration: float, easing: Union[str, Callable[[float], float]] = "linear",
+                 on_finish: Optional[Callable[[], None]] = None):
+        self.target = target
+        self.duration = max(duration, 1e-6)
+        self.easing = EASINGS[easing] if isinstance(easing, str) else easing
+        self.on_finish = on_finish
+        self.start_time = 0.0
+        self.cancelled = False
+        self.timeline: Optional["Timeline"] = None
+
+    @property
+    def key(self) -> tuple:
+        return self.target.store, self.target.slot, self.channel
+
+    def begin(self):
+        """Called once when the tween starts running"""
+
+    def update(self, progress: float):
+        """Write the eased progress (0..1) into the card's store slot"""
+
+    def end(self):
+        """Called once when the tween retires, finished or cancelled"""
+
+    def advance(self, now: float) -> bool:
+        """Apply the tween at time `now`, True once it is finished"""
+        t = min(1.0, (now - self.start_time) / self.duration)
+        self.update(self.easing(t))
+        return t >= 1.0
+
+class MoveTween(Tween):
+    """Moves a card to its target position. The target is read every step, so a layout push
+    or a drag during the tween changes where it lands instead of fighting it.
+    The store's own easing is off while the tween drives the card."""
+    channel = "move"
+
+    def __init__(self, target, end: Optional[Tuple[float, float]] = None, duration: float = 0.35,
+                 easing="ease_out_cubic", on_finish=None):
+        super().__init__(target, duration, easing, on_finish)
+        self.end_position = end
+        self.start = (0.0, 0.0)
+
+    def begin(self):
+        store, slot = self.target.store, self.target.slot
+        self.start = (float(store.x[slot]), float(store.y[slot]))
+        store.smooth_movement[slot] = False
+        if self.end_position is not None:
+            store.target_x[slot], store.target_y[slot] = self.end_position
+
+    def update(self, progress: float):
+        store, slot = self.target.store, self.target.slot
+        start_x, start_y = self.start
+        store.x[slot] = start_x + (store.target_x[slot] - start_x) * progress
+        store.y[slot] = start_y + (store.target_y[slot] - start_y) * progress
+        store.transform_dirty[slot] = True
+
+    def end(self):
+        self.target.store.smooth_movement[self.target.slot] = True
+
+class RotateTween(Tween):
+    """Turns a card to its target angle, the store's own rotation easing is off meanwhile"""
+    channel = "rotate"
+
+    def __init__(self, target, end: Optional[float] = None, duration: float = 0.35, easing="ease_out_cubic", on_finish=None):
+        super().__init__(target, duration, easing, on_finish)
+        self.end_angle = end
+        self.start = 0.0
+
+    def begin(self):
+        store, slot = self.target.store, self.target.slot
+        self.start = float(store.angle[slot])
+        store.smooth_rotation[slot] = False
+        if self.end_angle is not None:
+            store.target_angle[slot] = self.end_angle
+
+    def update(self, progress: float):
+        store, slot = self.target.store, self.target.slot
+        store.angle[slot] = self.start + (store.target_angle[slot] - self.start) * progress
+        store.transform_dirty[slot] = True
+
+    def end(self):
+        self.target.store.smooth_rotation[self.target.slot] = True
+
+class HoverTween(Tween):
+    """Bobs a hovered card up and down until it is cancelled"""
+    channel = "hover"
+
+    def __init__(self, target, height: float = 5.0, speed: float = 4.0):
+        super().__init__(target, 2 * math.pi / speed)
+        self.height = height
+        self.speed = speed
+
+    def begin(self):
+        store, slot = self.target.store, self.target.slot
+        store.is_animating[slot] = True
+        store.animation_type[slot] = ANIMATION_CODES["hover"]
+        store.hover_phase[slot] = 0.0
+
+    def advance(self, now: float) -> bool:
+        store, slot = self.target.store, self.target.slot
+        phase = (now - self.start_time) * self.speed
+        store.hover_phase[slot] = phase
+        store.hover_offset_y[slot] = math.sin(phase) * self.height
+        store.transform_dirty[slot] = True
+        return False
+
+    def end(self):
+        store, slot = self.target.store, self.target.slot
+        store.is_animating[slot] = False
+        store.animation_type[slot] = ANIMATION_CODES[None]
+        store.hover_offset_y[slot] = 0.0
+        store.transform_dirty[slot] = True
+
+class FlipTween(Tween):
+    """Turns a card over, the back and the front swap halfway while the card is edge-on"""
+    channel = "flip"
+
+    def __init__(self, target, duration: float = 0.4, easing="ease_in_out_sine", on_finish=None):
+        super().__init__(target, duration, easing, on_finish)
+        self.swapped = False
+
+    def begin(self):
+        store, slot = self.target.store, self.target.slot
+        store.is_flipping[slot] = True
+        store.flip_progress[slot] = 0.0
+
+    def update(self, progress: float):
+        store, slot = self.target.store, self.target.slot
+        store.flip_progress[slot] = progress
+        if progress >= 0.5 and not self.swapped:
+            store.face_down[slot] = not store.face_down[slot]
+            self.swapped = True
+        store.transform_dirty[slot] = True
+
+    def end(self):
+        store, slot = self.target.store, self.target.slot
+        store.is_flipping[slot] = False
+        store.flip_progress[slot] = 0.0
+        store.transform_dirty[slot] = True
+
+class Timeline:
+    """Tweens started together at fixed offsets, e.g. a dealt hand or a shuffle.
+    on_finish runs once every tween of the timeline has retired."""
+    def __init__(self, on_finish: Optional[Callable[[], None]] = None):
+        self.entries: List[Tuple[float, Tween]] = []
+        self.on_finish = on_finish
+        self._remaining = 0
+
+    def add(self, tween: Tween, at: float = 0.0) -> "Timeline":
+        self.entries.append((at, tween))
+        return self
+
+    def add_batch(self, tweens: Iterable[Tween], at: float = 0.0, stagger: float = 0.0) -> "Timeline":
+        for i, tween in enumerate(tweens):
+            self.add(tween, at + i * stagger)
+        return self
+
+    @property
+    def duration(self) -> float:
+        return max((at + tween.duration for at, tween in self.entries), default=0.0)
+
+    @property
+    def finished(self) -> bool:
+        return self._remaining == 0
+
+    def _retired(self):
+        self._remaining -= 1
+        if self._remaining == 0 and self.on_finish is not None:
+            self.on_finish()
+
+class AnimationScheduler:
+    """Owns every running tween. Tweens wait in a heap ordered by start time, only started ones
+    are stepped and finished ones retire on their own, so a step costs as much as the running
+    animations whatever the number of cards. tick() runs on the fixed timestep after the CardStore step."""
+    def __init__(self):
+        self.time = 0.0
+        self._pending: List[Tuple[float, int, Tween]] = []
+        self._running: Dict[tuple, Tween] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._running) + len(self._pending)
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def start(self, tween: Tween, delay: float = 0.0) -> Tween:
+        tween.start_time = self.time + delay
+        heapq.heappush(self._pending, (tween.start_time, next(self._sequence), tween))
+        return tween
+
+    def start_batch(self, tweens: Iterable[Tween], delay: float = 0.0, stagger: float = 0.0) -> List[Tween]:
+        """Start many tweens in one go, `stagger` seconds apart"""
+        return [self.start(tween, delay + i * stagger) for i, tween in enumerate(tweens)]
+
+    def play(self, timeline: Timeline, delay: float = 0.0) -> Timeline:
+        timeline._remaining = len(timeline.entries)
+        for at, tween in timeline.entries:
+            tween.timeline = timeline
+            self.start(tween, delay + at)
+        if not timeline.entries and timeline.on_finish is not None:
+            timeline.on_finish()
+        return timeline
+
+    def is_animating(self, target, channel: Optional[str] = None) -> bool:
+        store, slot = target.store, target.slot
+        if channel is not None:
+            return (store, slot, channel) in self._running
+        return any(key[0] is store and key[1] == slot for key in self._running)
+
+    def cancel(self, target, channel: Optional[str] = None, finish: bool = False):
+        """Stop the running and waiting tweens of a card, on every channel unless one is given.
+        With finish=True they jump to their end state and their callbacks run, e.g. before a resize."""
+        store, slot = target.store, target.slot
+        matches = lambda tween: tween.target.store is store and tween.target.slot == slot and channel in (None, tween.channel)
+        for key in [key for key, tween in self._running.items() if matches(tween)]:
+            self._retire(self._running.pop(key), finish)
+        pending = [entry for entry in self._pending if not entry[2].cancelled and matches(entry[2])]
+        for _, _, tween in sorted(pending):
+            if finish:
+                tween.begin()
+            self._retire(tween, finish)
+        if pending:
+            self._pending = [entry for entry in self._pending if not entry[2].cancelled]
+            heapq.heapify(self._pending)
+
+    def _retire(self, tween: Tween, finished: bool):
+        if finished:
+            tween.advance(tween.start_time + tween.duration)
+        tween.cancelled = True
+        tween.end()
+        if finished and tween.on_finish is not None:
+            tween.on_finish()
+        if tween.timeline is not None:
+            tween.timeline._retired()
+
+    def tick(self, dt: float):
+        self.time += dt
+        now = self.time
+        pending = self._pending
+        while pending and pending[0][0] <= now:
+            _, _, tween = heapq.heappop(pending)
+            if tween.cancelled:
+                continue
+            replaced = self._running.pop(tween.key, None)
+            if replaced is not None:
+                self._retire(replaced, False)
+            tween.begin()
+            self._running[tween.key] = tween
+        if not self._running:
+            return
+        finished = [key for key, tween in self._running.items() if tween.advance(now)]
+        for key in finished:
+            self._retire(self._running.pop(key), True)
+
+    def deal(self, cards: Sequence, placements: Sequence[Placement], origin: Optional[Tuple[float, float]] = None,
+             stagger: float = 0.06, duration: float = 0.35, easing="ease_out_cubic",
+             on_finish: Optional[Callable[[], None]] = None) -> Timeline:
+        """Deal cards one after the other from `origin` (e.g. the deck) to their placements.
+        The targets are set right away, so layouts and saves see where the cards are going."""
+        timeline = Timeline(on_finish)
+        for i, (card, (x, y, angle)) in enumerate(zip(cards, placements)):
+            store, slot = card.store, card.slot
+            # Held where it is, position and angle, until its turn
+            store.smooth_movement[slot] = store.smooth_rotation[slot] = False
+            if origin is not None:
+                store.x[slot] = store.prev_x[slot] = origin[0]
+                store.y[slot] = store.prev_y[slot] = origin[1]
+            store.target_x[slot], store.target_y[slot], store.target_angle[slot] = x, y, angle
+            timeline.add(MoveTween(card, (x, y), duration, easing), i * stagger)
+            timeline.add(RotateTween(card, angle, duration, easing), i * stagger)
+        return self.play(timeline)
+
+    def shuffle(self, cards: Sequence, center: Tuple[float, float], placements: Optional[Sequence[Placement]] = None,
+                offset: float = 60.0, duration: float = 0.2, stagger: float = 0.03,
+                on_finish: Optional[Callable[[], None]] = None) -> Timeline:
+        """Gather the cards on `center`, split the stack left and right twice, then deal them to
+        `placements` (where they were by default). The new order itself is up to the caller."""
+        if placements is None:
+            placements = [(card.target_x, card.target_y, card.target_angle) for card in cards]
+        timeline = Timeline(on_finish)
+        at = 0.0
+        timeline.add_batch((MoveTween(card, center, duration, "ease_in_out_quad") for card in cards), at)
+        timeline.add_batch((RotateTween(card, 0.0, duration) for card in cards), at)
+        at += duration
+        for _ in range(2):
+            split = [(center[0] + (offset if i % 2 else -offset), center[1]) for i in range(len(cards))]
+            timeline.add_batch((MoveTween(card, position, duration / 2, "ease_out_quad") for card, position in zip(cards, split)), at)
+            timeline.add_batch((MoveTween(card, center, duration / 2, "ease_in_quad") for card in cards), at + duration / 2)
+            at += duration
+        for i, (card, (x, y, angle)) in enumerate(zip(cards, placements)):
+            timeline.add(MoveTween(card, (x, y), duration * 1.5), at + i * stagger)
+            timeline.add(RotateTween(card, angle, duration * 1.5), at + i * stagger)
+        return self.play(timeline)
+
+animations = AnimationScheduler()
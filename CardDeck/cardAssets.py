@@ -1,38 +1,282 @@
+import io
 from Container.imports_library import *
-pygame.init()
+from Container.frameCounters import frame_counters
+from CardDeck.cardCache import SurfaceCache, surface_bytes
 
 LINK = "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/webfonts/fa-solid-900.ttf"
-def download_font_awesome():
-    """Download Font Awesome font file"""
-    response = requests.get(LINK)
-    return io.BytesIO(response.content)
+FONT_AWESOME_FILE = "fa-solid-900.ttf"
+ASSETS_DIR = Path(__file__).resolve().parent.parent / "Assets"
+LOCAL_FONT_PATH = ASSETS_DIR / "fonts" / FONT_AWESOME_FILE
+CARD_FRONT_PATH = ASSETS_DIR / "cardFront.png"
+CARD_BACK_PATH = ASSETS_DIR / "cardBack.png"
+DOWNLOAD_FONTS_ENV = "CARDGAME_DOWNLOAD_FONTS"
+
+def font_cache_dir() -> Path:
+    """Per-user cache directory for downloaded fonts"""
+    base = os.environ.get("CARDGAME_CACHE_DIR") or os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "CardGame" / "fonts"
+
+def resolve_font_awesome() -> Optional[Path]:
+    """Find Font Awesome on disk: the bundled asset first, then the cache directory"""
+    for candidate in (LOCAL_FONT_PATH, font_cache_dir() / FONT_AWESOME_FILE):
+        if candidate.is_file():
+            return candidate
+    return None
+
+def download_font_awesome(destination: Optional[Path] = None, timeout: float = 10.0) -> Path:
+    """Download Font Awesome into the cache directory (explicit opt-in, never done implicitly)"""
+    # requests is only needed here, importing it at startup costs more than the rest of the game code
+    import requests
+    destination = Path(destination) if destination else font_cache_dir() / FONT_AWESOME_FILE
+    response = requests.get(LINK, timeout=timeout)
+    response.raise_for_status()
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = destination.with_suffix(".part")
+    temp_path.write_bytes(response.content)
+    os.replace(temp_path, destination)
+    return destination
+
+def prepare_fonts() -> Optional[Tuple[str, bytes]]:
+    """Font lookups that do not touch SDL and can run on a worker thread: the system font scan
+    and reading Font Awesome from disk. Pass the result to IconRenderer so it does not read the file again"""
+    pygame.sysfont.get_fonts()
+    font_path = resolve_font_awesome()
+    return (str(font_path), font_path.read_bytes()) if font_path is not None else None
+
+class ImageAssets:
+    """Decodes every image file once and shares its scaled variants, keyed by (path, size)"""
+    def __init__(self, atlas_width: int = 2048):
+        self.atlas_width = atlas_width
+        self._sources: Dict[str, pygame.Surface] = {}
+        self._scaled: Dict[Tuple[str, Tuple[int, int]], pygame.Surface] = {}
+        self._atlases = []
+        self.decode_count = 0
+    
+    @staticmethod
+    def asset_key(path, size: Tuple[int, int]) -> Tuple[str, Tuple[int, int]]:
+        # Paths in the code use both separators, normalize them so one file has one key
+        return os.path.abspath(str(path).replace("\\", "/")), (int(size[0]), int(size[1]))
+    
+    def get_source(self, path) -> pygame.Surface:
+        path = self.asset_key(path, (0, 0))[0]
+        source = self._sources.get(path)
+        if source is None:
+            source = pygame.image.load(path).convert_alpha()
+            self._sources[path] = source
+            self.decode_count += 1
+        return source
+    
+    def add_source(self, path, surface: pygame.Surface) -> pygame.Surface:
+        """Store an image decoded elsewhere, e.g. on a loader thread, converting it here on the main thread"""
+        path = self.asset_key(path, (0, 0))[0]
+        source = surface.convert_alpha()
+        self._sources[path] = source
+        self.decode_count += 1
+        return source
+    
+    def has_source(self, path) -> bool:
+        return self.asset_key(path, (0, 0))[0] in self._sources
+    
+    def load(self, path, size: Tuple[int, int]) -> pygame.Surface:
+        """Shared surface of `path` scaled to `size`, raises pygame.error/OSError if it cannot be decoded"""
+        key = self.asset_key(path, size)
+        surface = self._scaled.get(key)
+        if surface is None:
+            surface = pygame.transform.scale(self.get_source(key[0]), key[1])
+            self._scaled[key] = surface
+        return surface
+    
+    def pack_atlas(self, keys=None) -> Optional[pygame.Surface]:
+        """Pack scaled images into one atlas surface and replace them by sub-surface views of it.
+        Cards loaded afterwards share the atlas instead of holding their own copies."""
+        keys = [key for key in (keys or list(self._scaled)) if self._scaled[key].get_parent() is None]
+        if not keys:
+            return None
+        placements = []
+        x = y = shelf_height = atlas_width = atlas_height = 0
+        # Simple shelf packing, tallest images first
+        for key in sorted(keys, key=lambda k: self._scaled[k].get_height(), reverse=True):
+            width, height = self._scaled[key].get_size()
+            if x + width > self.atlas_width:
+                x, y = 0, y + shelf_height
+                shelf_height = 0
+            placements.append((key, pygame.Rect(x, y, width, height)))
+            x += width
+            shelf_height = max(shelf_height, height)
+            atlas_width = max(atlas_width, x)
+            atlas_height = max(atlas_height, y + height)
+        atlas = pygame.Surface((atlas_width, atlas_height), pygame.SRCALPHA)
+        for key, rect in placements:
+            atlas.blit(self._scaled[key], rect)
+            self._scaled[key] = atlas.subsurface(rect)
+        self._atlases.append(atlas)
+        return atlas
+    
+    def preload(self, entries, atlas: bool = False):
+        """Decode and scale (path, size) entries up front, optionally packing them into an atlas"""
+        keys = [self.asset_key(path, size) for path, size in entries]
+        for path, size in keys:
+            self.load(path, size)
+        if atlas:
+            self.pack_atlas(keys)
+    
+    def prune(self, entries):
+        """Forget the other sizes of the (path, size) `entries`, e.g. after a resize, and the atlases nothing
+        uses any more. Cards still showing an old size keep their surfaces alive until they are rescaled."""
+        keep = {self.asset_key(path, size) for path, size in entries}
+        paths = {path for path, _ in keep}
+        for key in [key for key in self._scaled if key[0] in paths and key not in keep]:
+            del self._scaled[key]
+        used = {id(surface.get_parent()) for surface in self._scaled.values() if surface.get_parent() is not None}
+        self._atlases = [atlas for atlas in self._atlases if id(atlas) in used]
+    
+    def bytes_held(self) -> Dict[str, int]:
+        scaled = sum(surface_bytes(surface) for surface in self._scaled.values() if surface.get_parent() is None)
+        return {
+            "sources": sum(surface_bytes(surface) for surface in self._sources.values()),
+            "scaled": scaled,
+            "atlases": sum(surface_bytes(atlas) for atlas in self._atlases),
+        }
+    
+    def report(self) -> str:
+        held = self.bytes_held()
+        total = sum(held.values())
+        return (f"{len(self._sources)} decoded files ({self.decode_count} decodes), {len(self._scaled)} scaled variants, "
+                f"{len(self._atlases)} atlases, {total / 1024:.1f} KiB held "
+                f"(sources {held['sources'] / 1024:.1f}, scaled {held['scaled'] / 1024:.1f}, atlases {held['atlases'] / 1024:.1f})")
+    
+    def clear(self):
+        self._sources.clear()
+        self._scaled.clear()
+        self._atlases.clear()
+
+image_assets = ImageAssets()
+
+NUMBER_GLYPHS = "0123456789-"
+CARD_ICONS = "\uf004\uf6e3\uf132\uf062"  # health, attack, defense, level
+
+class GlyphAtlas:
+    """Glyphs of one (font, size, color) rendered once and packed side by side into a single surface"""
+    def __init__(self, font: pygame.font.Font, color: Tuple[int, int, int], glyphs: str = ""):
+        self.font = font
+        self.color = color
+        self.rects: Dict[str, pygame.Rect] = {}
+        self.surface = pygame.Surface((1, max(1, font.get_height())), pygame.SRCALPHA)
+        self.add(glyphs)
+    
+    def add(self, glyphs: str):
+        """Render the glyphs that are missing and grow the atlas to hold them"""
+        missing = [glyph for glyph in dict.fromkeys(glyphs) if glyph not in self.rects]
+        if not missing:
+            return
+        renders = [(glyph, self.font.render(glyph, True, self.color)) for glyph in missing]
+        frame_counters.increment("font_renders", len(renders))
+        used_width = sum(rect.width for rect in self.rects.values())
+        width = used_width + sum(render.get_width() for _, render in renders)
+        height = max([self.surface.get_height()] + [render.get_height() for _, render in renders])
+        atlas = pygame.Surface((max(1, width), height), pygame.SRCALPHA)
+        atlas.blit(self.surface, (0, 0))
+        x = used_width
+        for glyph, render in renders:
+            atlas.blit(render, (x, 0))
+            self.rects[glyph] = pygame.Rect(x, 0, render.get_width(), render.get_height())
+            x += render.get_width()
+        self.surface = atlas
+    
+    def size(self, text: str) -> Tuple[int, int]:
+        return sum(self.rects[glyph].width for glyph in text), self.surface.get_height()
+    
+    def blit_text(self, surface: pygame.Surface, position: Tuple[int, int], text: str) -> pygame.Rect:
+        """Compose text from atlas sub-rects, no text shaping involved"""
+        self.add(text)
+        x, y = position
+        for glyph in text:
+            rect = self.rects[glyph]
+            surface.blit(self.surface, (x, y), rect)
+            x += rect.width
+        frame_counters.increment("glyph_blits", len(text))
+        return pygame.Rect(position[0], y, x - position[0], self.surface.get_height())
 
 class IconRenderer:
-    def __init__(self, font_size: Tuple[int, int, int]):
+    def __init__(self, font_size: Tuple[int, int, int], allow_download: Optional[bool] = None,
+                 font_data: Optional[Tuple[str, bytes]] = None):
         self.size = font_size
-        try:
-            self.font_data = download_font_awesome()
-            self.icon_font = pygame.font.Font(self.font_data, self.size[0])
-        except:
-            self.icon_font = pygame.font.SysFont('arial', self.size[0])
+        if allow_download is None:
+            allow_download = os.environ.get(DOWNLOAD_FONTS_ENV) == "1"
+        if not pygame.font.get_init():
+            pygame.font.init()
+        start = time.perf_counter()
+        self.icon_font, self.font_source = self._load_icon_font(allow_download, font_data)
         self.small_font = pygame.font.SysFont('arial', self.size[1])
         self.text_font = pygame.font.SysFont('arial', self.size[2])
+        self.font_load_time = time.perf_counter() - start
+        self._atlases: Dict[Tuple[str, Tuple[int, ...]], GlyphAtlas] = {}
+        self._text_cache = SurfaceCache(max_bytes=1024 * 1024)
+    
+    def _load_icon_font(self, allow_download: bool, font_data: Optional[Tuple[str, bytes]] = None):
+        if font_data is not None:
+            # Bytes read by prepare_fonts on the loader thread, the font keeps the buffer alive
+            source, data = font_data
+            try:
+                return pygame.font.Font(io.BytesIO(data), self.size[0]), source
+            except (pygame.error, OSError) as error:
+                print(f"Could not load {source}: {error}")
+        font_path = resolve_font_awesome()
+        if font_path is None and allow_download:
+            try:
+                font_path = download_font_awesome()
+            except (ImportError, OSError) as error:
+                print(f"Font Awesome download failed: {error}")
+        if font_path is not None:
+            try:
+                return pygame.font.Font(str(font_path), self.size[0]), str(font_path)
+            except (pygame.error, OSError) as error:
+                print(f"Could not load {font_path}: {error}")
+        print(f"Font Awesome not found, icons fall back to Arial (set {DOWNLOAD_FONTS_ENV}=1 or run 'python -m CardDeck.cardAssets --download-fonts')")
+        return pygame.font.SysFont('arial', self.size[0]), "arial"
         
+    def get_atlas(self, font_role: str, color) -> GlyphAtlas:
+        """Atlas for the icon or number font in one color, created with the card icons and digits pre-rendered"""
+        color = tuple(pygame.Color(color))
+        key = (font_role, color)
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            if font_role == "icon":
+                atlas = GlyphAtlas(self.icon_font, color, CARD_ICONS)
+            else:
+                atlas = GlyphAtlas(self.small_font, color, NUMBER_GLYPHS)
+            self._atlases[key] = atlas
+        return atlas
+    
     def draw_Icon_and_Number(self, icon_unicode: str, icon_color: pygame.Color, surface: pygame.Surface, position: Tuple[int, int], value: int):
-        icon_surface = self.icon_font.render(icon_unicode, True, icon_color)
         value_position = (position[0], position[1] + self.size[0])
-        value_surface = self.small_font.render('{number}'.format(number=value), True, icon_color)
-        
-        surface.blit(icon_surface, position)
-        surface.blit(value_surface, value_position)
-        return icon_surface.get_rect(center=position)
+        icon_rect = self.get_atlas("icon", icon_color).blit_text(surface, position, icon_unicode)
+        self.get_atlas("number", icon_color).blit_text(surface, value_position, '{number}'.format(number=value))
+        icon_rect.center = position
+        return icon_rect
     
     def draw_icon(self, icon_unicode: str, icon_color: pygame.Color, surface: pygame.Surface, position: Tuple[int, int]):
-        icon_surface = self.icon_font.render(icon_unicode, True, icon_color)
-        surface.blit(icon_surface, position)
-        return icon_surface.get_rect(center=position)
+        icon_rect = self.get_atlas("icon", icon_color).blit_text(surface, position, icon_unicode)
+        icon_rect.center = position
+        return icon_rect
     
     def draw_words(self, string_color: pygame.Color, surface: pygame.Surface, position: Tuple[int, int], string: str):
         string_position = position
-        string_surface = self.small_font.render('{number}'.format(number=string), True, string_color)
-        surface.blit(string_surface, string_position)
\ No newline at end of file
+        text = '{number}'.format(number=string)
+        # Arbitrary strings are rendered whole and kept in a bounded cache
+        cache_key = (text, tuple(pygame.Color(string_color)))
+        string_surface = self._text_cache.get(cache_key)
+        if string_surface is None:
+            string_surface = self._text_cache.put(cache_key, self.small_font.render(text, True, string_color))
+            frame_counters.increment("font_renders")
+        surface.blit(string_surface, string_position)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Card asset utilities")
+    parser.add_argument("--download-fonts", action="store_true", help="download Font Awesome into the font cache directory")
+    args = parser.parse_args()
+    if args.download_fonts:
+        print(f"Font Awesome saved to {download_font_awesome()}")
+    renderer = IconRenderer(font_size=[12, 12, 12])
+    print(f"Icon font: {renderer.font_source} ({renderer.font_load_time * 1000:.1f} ms)")
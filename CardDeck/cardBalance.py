@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+import numpy as np
+from CardDeck.cardModel import CardRarity, STAT_RANGES
+from CardDeck.cardEngine import GameEngine
+from Container.rngService import RngService
+
+RARITIES = list(CardRarity)
+STAT_NAMES = ("attack", "health", "defense")
+
+def rarity_probabilities() -> np.ndarray:
+    weights = np.array([rarity.weight for rarity in RARITIES])
+    return weights / weights.sum()
+
+def deck_composition(deck) -> str:
+    """Share of each card type in a deck, rounded to 10% buckets"""
+    counts = Counter(card.card_type for card in deck)
+    size = max(1, len(deck))
+    return ",".join(f"{card_type}={round(counts[card_type] * 10 / size) * 10}%" for card_type in ("Standard", "Bonus", "Cursed"))
+
+def empty_histograms() -> dict:
+    return {
+        "draws": 0,
+        "rarity": {rarity.name: 0 for rarity in RARITIES},
+        "stats": {rarity.name: {stat: {} for stat in STAT_NAMES} for rarity in RARITIES},
+        "games": 0,
+        "winners": {},
+        "compositions": {},
+    }
+
+def run_chunk(chunk_id: int, entropy: int, draws: int, games: int, draw_count: int) -> dict:
+    """Sample `draws` cards and play `games` games with the seed stream of this chunk"""
+    # Every chunk gets its own child of the run seed, results do not depend on the worker count
+    rng_service = RngService(entropy).spawn(chunk_id)
+    generator = rng_service.generator("balance")
+    histograms = empty_histograms()
+    histograms["chunk"] = chunk_id
+    histograms["draws"] = draws
+    rarity_counts = np.bincount(generator.choice(len(RARITIES), size=draws, p=rarity_probabilities()), minlength=len(RARITIES))
+    for rarity, count in zip(RARITIES, rarity_counts.tolist()):
+        histograms["rarity"][rarity.name] = count
+        for stat, (low, high) in zip(STAT_NAMES, STAT_RANGES[rarity][:3]):
+            values = np.bincount(generator.integers(low, high + 1, size=count) - low, minlength=high - low + 1)
+            histograms["stats"][rarity.name][stat] = {str(low + value): int(n) for value, n in enumerate(values) if n}
+    for game in range(games):
+        engine = GameEngine(draw_count=draw_count, rng_service=rng_service.spawn(game))
+        compositions = [deck_composition(player.deck) for player in engine.players]
+        winner = engine.run()
+        histograms["games"] += 1
+        histograms["winners"][str(winner)] = histograms["winners"].get(str(winner), 0) + 1
+        for player, composition in zip(engine.players, compositions):
+            played, won = histograms["compositions"].get(composition, (0, 0))
+            histograms["compositions"][composition] = (played + 1, won + (winner == player.name))
+    return histograms
+
+def merge(total: dict, part: dict) -> dict:
+    total["draws"] += part["draws"]
+    total["games"] += part["games"]
+    for name, count in part["rarity"].items():
+        total["rarity"][name] += count
+    for name, stats in part["stats"].items():
+        for stat, values in stats.items():
+            merged = total["stats"][name][stat]
+            for value, count in values.items():
+                merged[value] = merged.get(value, 0) + count
+    for winner, count in part["winners"].items():
+        total["winners"][winner] = total["winners"].get(winner, 0) + count
+    for composition, (played, won) in part["compositions"].items():
+        total_played, total_won = total["compositions"].get(composition, (0, 0))
+        total["compositions"][composition] = (total_played + played, total_won + won)
+    return total
+
+def summarize(total: dict) -> dict:
+    probabilities = rarity_probabilities()
+    rarity = {}
+    for index, card_rarity in enumerate(RARITIES):
+        count = total["rarity"][card_rarity.name]
+        stats = {}
+        for stat, values in total["stats"][card_rarity.name].items():
+            if values:
+                numbers = np.array([int(value) for value in values])
+                weights = np.array(list(values.values()))
+                stats[stat] = {"mean": float(np.average(numbers, weights=weights)), "min": int(numbers.min()), "max": int(numbers.max())}
+        rarity[card_rarity.name] = {
+            "count": count,
+            "frequency": count / total["draws"] if total["draws"] else 0.0,
+            "expected": float(probabilities[index]),
+            "stats": stats,
+        }
+    win_rates = {composition: {"games": played, "win_rate": won / played}
+                 for composition, (played, won) in sorted(total["compositions"].items()) if played}
+    return {"draws": total["draws"], "games": total["games"], "rarity": rarity, "winners": total["winners"], "win_rates": win_rates}
+
+def load_checkpoint(path: Optional[str], config: dict):
+    if path and os.path.exists(path):
+        with open(path) as file:
+            checkpoint = json.load(file)
+        if checkpoint["config"] != config:
+            raise ValueError(f"checkpoint {path} was written for another configuration: {checkpoint['config']}")
+        return set(checkpoint["completed"]), checkpoint["total"]
+    return set(), empty_histograms()
+
+def save_checkpoint(path: Optional[str], config: dict, completed, total: dict):
+    if not path:
+        return
+    # Write next to the target and swap, an interrupted run never leaves a half written checkpoint
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump({"config": config, "completed": sorted(completed), "total": total}, file)
+    os.replace(temp_path, path)
+
+def run_balance(draws: int, games: int, seed: int, workers: Optional[int] = None, chunk_draws: int = 1_000_000,
+                chunk_games: int = 50, draw_count: int = 3, checkpoint: Optional[str] = None) -> dict:
+    """Run the Monte-Carlo batch over a process pool, resuming from `checkpoint` when it exists"""
+    chunk_count = max(1, -(-draws // chunk_draws), -(-games // chunk_games))
+    jobs: List[tuple] = []
+    for chunk_id in range(chunk_count):
+        chunk_draw_total = min(chunk_draws, max(0, draws - chunk_id * chunk_draws))
+        chunk_game_total = min(chunk_games, max(0, games - chunk_id * chunk_games))
+        jobs.append((chunk_id, seed, chunk_draw_total, chunk_game_total, draw_count))
+    config = {"draws": draws, "games": games, "seed": seed, "chunk_draws": chunk_draws, "chunk_games": chunk_games, "draw_count": draw_count}
+    completed, total = load_checkpoint(checkpoint, config)
+    pending = [job for job in jobs if job[0] not in completed]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_chunk, *job) for job in pending]
+        for future in as_completed(futures):
+            part = future.result()
+            merge(total, part)
+            completed.add(part["chunk"])
+            save_checkpoint(checkpoint, config, completed, total)
+            print(f"chunk {part['chunk']} done ({len(completed)}/{chunk_count})")
+    return summarize(total)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte-Carlo balance runner for card rarity weights, stat ranges and win rates")
+    parser.add_argument("--draws", type=int, default=10_000_000, help="cards to sample")
+    parser.add_argument("--games", type=int, default=1000, help="simulated games to play")
+    parser.add_argument("--seed", type=int, default=0, help="run seed, every chunk derives its own stream from it")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-draws", type=int, default=1_000_000)
+    parser.add_argument("--chunk-games", type=int, default=50)
+    parser.add_argument("--draw-count", type=int, default=3, help="cards drawn per turn")
+    parser.add_argument("--checkpoint", default=None, help="checkpoint file, an existing one is resumed")
+    parser.add_argument("--output", default=None, help="write the summary JSON here instead of stdout")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    summary = run_balance(args.draws, args.games, args.seed, args.workers, args.chunk_draws, args.chunk_games, args.draw_count, args.checkpoint)
+    summary["seconds"] = time.perf_counter() - start
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(summary, file, indent=2)
+    else:
+        print(json.dumps(summary, indent=2))
@@ -0,0 +1,199 @@
+from Container.imports_library import *
+from Container.frameCounters import frame_counters
+from collections import OrderedDict
+import itertools
+
+# Every rebuilt card face gets a new version so cached derivatives never go stale
+_face_versions = itertools.count(1)
+def next_face_version() -> int:
+    return next(_face_versions)
+
+def surface_bytes(surface: pygame.Surface) -> int:
+    return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
+class SurfaceCache:
+    """LRU cache of surfaces bounded by a byte budget"""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes_held = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key) -> Optional[pygame.Surface]:
+        surface = self._entries.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return surface
+
+    def put(self, key, surface: pygame.Surface) -> pygame.Surface:
+        if key in self._entries:
+            self.bytes_held -= surface_bytes(self._entries.pop(key))
+        self._entries[key] = surface
+        self.bytes_held += surface_bytes(surface)
+        self._evict()
+        return surface
+
+    def discard(self, predicate):
+        """Remove every entry whose key matches `predicate`"""
+        for key in [key for key in self._entries if predicate(key)]:
+            self.bytes_held -= surface_bytes(self._entries.pop(key))
+
+    def set_budget(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone is over budget
+        while self.bytes_held > self.max_bytes and len(self._entries) > 1:
+            _, surface = self._entries.popitem(last=False)
+            self.bytes_held -= surface_bytes(surface)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_held = 0
+
+class RotationCache:
+    """Rotated card faces shared by all cards, keyed by (face version, quantized angle)"""
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, angle_step: float = 1.0):
+        self.angle_step = angle_step
+        self.cache = SurfaceCache(max_bytes)
+
+    def quantize(self, angle: float) -> float:
+        quantized = round(angle / self.angle_step) * self.angle_step
+        return round(quantized % 360.0, 4)
+
+    def get_rotated(self, face: pygame.Surface, face_version: int, angle: float) -> pygame.Surface:
+        quantized = self.quantize(angle)
+        if quantized == 0.0:
+            return face
+        key = (face_version, quantized)
+        rotated = self.cache.get(key)
+        if rotated is None:
+            rotated = self.cache.put(key, pygame.transform.rotate(face, quantized))
+            frame_counters.increment("rotate_calls")
+        return rotated
+
+    def prewarm(self, face: pygame.Surface, face_version: int, angles):
+        """Render the given angles ahead of time, e.g. the fan angles of a hand"""
+        for angle in angles:
+            self.get_rotated(face, face_version, angle)
+
+class TintCache:
+    """Colorized and rarity-dyed faces keyed by stable asset keys, LRU evicted within a byte budget"""
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.cache = SurfaceCache(max_bytes)
+
+    def colorize(self, image: pygame.Surface, color, image_key) -> pygame.Surface:
+        """Replace the color of every pixel while keeping the alpha of `image`"""
+        key = ("colorize", image_key, tuple(color[0:3]))
+        colorized = self.cache.get(key)
+        if colorized is None:
+            colorized = image.copy()
+            colorized.fill((0, 0, 0, 255), None, pygame.BLEND_RGBA_MULT)
+            colorized.fill(tuple(color[0:3]) + (0,), None, pygame.BLEND_RGBA_ADD)
+            self.cache.put(key, colorized)
+            frame_counters.increment("tint_renders")
+        return colorized
+
+    def dyed_face(self, face: pygame.Surface, dye_color, face_key, alpha: int = 80) -> pygame.Surface:
+        """Face multiplied by a semi-transparent dye color, built once per (face asset, dye color)"""
+        key = ("dye", face_key, tuple(dye_color[0:3]), alpha)
+        # Faces without an asset key cannot be told apart safely, so they are dyed every time
+        dyed = self.cache.get(key) if face_key is not None else None
+        if dyed is None:
+            dyed = face.copy()
+            overlay = pygame.Surface(face.get_size(), pygame.SRCALPHA)
+            overlay.fill((*dye_color[0:3], alpha))
+            dyed.blit(overlay, (0, 0), special_flags=pygame.BLEND_MULT)
+            if face_key is not None:
+                self.cache.put(key, dyed)
+            frame_counters.increment("tint_renders")
+        return dyed
+
+    def prewarm(self, face: pygame.Surface, face_key, dye_colors):
+        for dye_color in dye_colors:
+            self.dyed_face(face, dye_color, face_key)
+
+    def invalidate_asset(self, face_key):
+        """Drop every tint of an asset, e.g. after it was reloaded at another size"""
+        self.cache.discard(lambda key: key[1] == face_key)
+
+class FlipFrameCache:
+    """Horizontally squashed frames of a card side for the flip animation, keyed by (face version, step).
+    A side has at most `steps` frames, each built once and shared by every card with that face,
+    so flipping a whole deck again only blits. Unused frames are LRU evicted within a byte budget."""
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, steps: int = 8):
+        self.steps = steps
+        self.cache = SurfaceCache(max_bytes)
+
+    def step_of(self, squash: float) -> int:
+        """Frame index for a width factor in 0..1, `steps` is the unsquashed face"""
+        return min(self.steps, max(0, int(round(squash * self.steps))))
+
+    def get_frame(self, face: pygame.Surface, face_version, squash: float) -> Tuple[pygame.Surface, Any]:
+        """Frame of `face` squashed to `squash` of its width and a version for the rotation cache"""
+        step = self.step_of(squash)
+        if step == self.steps:
+            return face, face_version
+        frame = self.cache.get((face_version, step))
+        if frame is None:
+            frame = self._build(face, face_version, step)
+        return frame, ("flip", face_version, step)
+
+    def _build(self, face: pygame.Surface, face_version, step: int) -> pygame.Surface:
+        width, height = face.get_size()
+        # Edge-on the card is still one pixel wide, so the frame never disappears
+        frame = pygame.transform.scale(face, (max(1, round(width * step / self.steps)), height))
+        frame_counters.increment("flip_renders")
+        return self.cache.put((face_version, step), frame)
+
+    def prewarm(self, face: pygame.Surface, face_version):
+        """Build every frame of a side ahead of time"""
+        for step in range(self.steps):
+            if (face_version, step) not in self.cache:
+                self._build(face, face_version, step)
+
+    def clear(self):
+        self.cache.clear()
+
+class FaceCache:
+    """Rendered card faces keyed by their face signature, which includes the card size.
+    Going back to a window size used before (windowed vs fullscreen) reuses the faces rendered for it."""
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.cache = SurfaceCache(max_bytes)
+        self._versions: Dict[Any, int] = {}
+
+    def get(self, signature) -> Optional[Tuple[pygame.Surface, int]]:
+        face = self.cache.get(signature)
+        if face is None:
+            return None
+        return face, self._versions[signature]
+
+    def put(self, signature, face: pygame.Surface) -> int:
+        """Store a face and return its new version"""
+        version = next_face_version()
+        self.cache.put(signature, face)
+        self._versions[signature] = version
+        # Drop versions of evicted faces once they pile up
+        if len(self._versions) > 2 * len(self.cache):
+            self._versions = {key: value for key, value in self._versions.items() if key in self.cache}
+        return version
+
+    def clear(self):
+        self.cache.clear()
+        self._versions.clear()
+
+rotation_cache = RotationCache()
+face_cache = FaceCache()
+flip_cache = FlipFrameCache()
+tint_cache = TintCache()
@@ -0,0 +1,256 @@
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from CardDeck.cardModel import CardModel, CardRarity, CARD_TYPES, calculate_xp_requirement
+from CardDeck.cardSave import RARITIES, RARITY_INDEX, TYPE_INDEX, FLAG_ASLEEP, save_dir
+
+STAT_COLUMNS = ("attack", "health", "defense", "level")
+SORT_COLUMNS = ("id", "rarity", "card_type", "attack", "health", "defense", "level", "acquired")
+COLUMNS = "id, rarity, card_type, attack, health, defense, level, xp, max_xp, flags"
+Range = Tuple[Optional[int], Optional[int]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY,
+    rarity INTEGER NOT NULL,
+    card_type INTEGER NOT NULL,
+    attack INTEGER NOT NULL,
+    health INTEGER NOT NULL,
+    defense INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    xp INTEGER NOT NULL,
+    max_xp INTEGER NOT NULL,
+    flags INTEGER NOT NULL DEFAULT 0,
+    acquired REAL NOT NULL
+);
+""" + "".join(
+    # rarity and type have few values, so these also serve stat-only filters through skip-scans
+    f"CREATE INDEX IF NOT EXISTS cards_{stat} ON cards (rarity, card_type, {stat});\n" for stat in STAT_COLUMNS)
+
+def collection_path() -> Path:
+    return save_dir() / "collection.sqlite3"
+
+def card_row(model: CardModel, acquired: float) -> tuple:
+    return (RARITY_INDEX[model.rarity], TYPE_INDEX[model.card_type], model.attack, model.health, model.defense,
+            model.level, model.xp, model.max_xp, FLAG_ASLEEP if model.is_asleep else 0, acquired)
+
+def row_model(row: Sequence[int]) -> Tuple[int, CardModel]:
+    card_id, rarity, card_type, attack, health, defense, level, xp, max_xp, flags = row
+    return card_id, CardModel(RARITIES[rarity], CARD_TYPES[card_type], attack, health, defense, level, xp, max_xp, bool(flags & FLAG_ASLEEP))
+
+@dataclass
+class CardFilter:
+    """Cards to match, every field left empty matches everything. Ranges are inclusive (low, high),
+    None leaves a side open, e.g. attack=(101, None) is attack > 100."""
+    rarity: Union[CardRarity, Sequence[CardRarity], None] = None
+    card_type: Union[str, Sequence[str], None] = None
+    attack: Optional[Range] = None
+    health: Optional[Range] = None
+    defense: Optional[Range] = None
+    level: Optional[Range] = None
+
+    def where(self) -> Tuple[str, list]:
+        clauses, params = [], []
+        for column, values, index in (("rarity", self.rarity, RARITY_INDEX), ("card_type", self.card_type, TYPE_INDEX)):
+            if values is None:
+                continue
+            values = [values] if isinstance(values, (CardRarity, str)) else list(values)
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(index[value] for value in values)
+        for column in STAT_COLUMNS:
+            bounds = getattr(self, column)
+            if bounds is None:
+                continue
+            low, high = bounds
+            if low is not None:
+                clauses.append(f"{column} >= ?")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"{column} <= ?")
+                params.append(high)
+        return " AND ".join(clauses) or "1", params
+
+@dataclass
+class CollectionPage:
+    """One page of a query, pass `cursor` back as `after` for the next page (None on the last page)"""
+    cards: List[Tuple[int, CardModel]] = field(default_factory=list)
+    cursor: Optional[Tuple[int, int]] = None
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self) -> Iterator[Tuple[int, CardModel]]:
+        return iter(self.cards)
+
+class CardCollection:
+    """The player's card collection in SQLite, indexed on rarity, type and the stats.
+    Queries only read the page they return, so collections of millions of cards never load into memory.
+    Pages continue from the last (sort value, id) seen instead of an OFFSET, every page costs the same."""
+    def __init__(self, path: Union[str, Path, None] = None):
+        if path is None:
+            path = collection_path()
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(str(path))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        # Bulk inserts spend most of their time updating the indexes, a bigger page cache keeps them in memory
+        self.connection.execute("PRAGMA cache_size=-32768")
+        self.connection.execute("PRAGMA temp_store=MEMORY")
+        self.connection.executescript(SCHEMA)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+
+    def add(self, model: CardModel) -> int:
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO cards (rarity, card_type, attack, health, defense, level, xp, max_xp, flags, acquired) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", card_row(model, time.time()))
+        return cursor.lastrowid
+
+    def add_many(self, models: Iterable[CardModel]) -> int:
+        """Bulk insert, e.g. a pack opening, in one transaction. Returns the number of cards added"""
+        acquired = time.time()
+        return self._insert(card_row(model, acquired) for model in models)
+
+    def add_batch(self, batch) -> int:
+        """Bulk insert straight from the columns of a DeckBatch, without creating CardModels"""
+        acquired = time.time()
+        level = batch.level.tolist()
+        max_xp = {value: calculate_xp_requirement(value) for value in set(level)}
+        rows = zip(batch.rarity.tolist(), batch.card_type.tolist(), batch.attack.tolist(), batch.health.tolist(),
+                   batch.defense.tolist(), level, [0] * len(level), [max_xp[value] for value in level],
+                   [0] * len(level), [acquired] * len(level))
+        return self._insert(rows)
+
+    def _insert(self, rows: Iterable[tuple]) -> int:
+        before = self.connection.total_changes
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO cards (rarity, card_type, attack, health, defense, level, xp, max_xp, flags, acquired) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        # Keeps the planner statistics current, it only analyzes when the table changed enough
+        self.connection.execute("PRAGMA optimize")
+        return self.connection.total_changes - before
+
+    def get(self, card_id: int) -> CardModel:
+        row = self.connection.execute(f"SELECT {COLUMNS} FROM cards WHERE id = ?", (card_id,)).fetchone()
+        if row is None:
+            raise KeyError(card_id)
+        return row_model(row)[1]
+
+    def update(self, card_id: int, model: CardModel):
+        with self.connection:
+            self.connection.execute(
+                "UPDATE cards SET rarity = ?, card_type = ?, attack = ?, health = ?, defense = ?, level = ?, xp = ?, "
+                "max_xp = ?, flags = ? WHERE id = ?", card_row(model, 0.0)[:-1] + (card_id,))
+
+    def remove(self, card_ids: Iterable[int]) -> int:
+        before = self.connection.total_changes
+        with self.connection:
+            self.connection.executemany("DELETE FROM cards WHERE id = ?", ((card_id,) for card_id in card_ids))
+        return self.connection.total_changes - before
+
+    def count(self, card_filter: Optional[CardFilter] = None) -> int:
+        where, params = (card_filter or CardFilter()).where()
+        return self.connection.execute(f"SELECT COUNT(*) FROM cards WHERE {where}", params).fetchone()[0]
+
+    def rarity_counts(self, card_filter: Optional[CardFilter] = None) -> Dict[CardRarity, int]:
+        where, params = (card_filter or CardFilter()).where()
+        rows = self.connection.execute(f"SELECT rarity, COUNT(*) FROM cards WHERE {where} GROUP BY rarity", params)
+        counts = dict.fromkeys(RARITIES, 0)
+        counts.update((RARITIES[rarity], count) for rarity, count in rows)
+        return counts
+
+    def _page_query(self, card_filter: Optional[CardFilter], order_by: str, descending: bool,
+                    page_size: int, after: Optional[Tuple[int, int]]) -> Tuple[str, list]:
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"cannot sort by {order_by!r}, use one of {', '.join(SORT_COLUMNS)}")
+        where, params = (card_filter or CardFilter()).where()
+        direction, compare = ("DESC", "<") if descending else ("ASC", ">")
+        if after is not None:
+            where += f" AND ({order_by}, id) {compare} (?, ?)"
+            params += list(after)
+        return (f"SELECT {COLUMNS}, {order_by} FROM cards WHERE {where} "
+                f"ORDER BY {order_by} {direction}, id {direction} LIMIT ?", params + [page_size])
+
+    def query(self, card_filter: Optional[CardFilter] = None, order_by: str = "id", descending: bool = False,
+              page_size: int = 50, after: Optional[Tuple[int, int]] = None) -> CollectionPage:
+        """One page of matching cards as (id, CardModel), e.g. for the collection browser"""
+        sql, params = self._page_query(card_filter, order_by, descending, page_size + 1, after)
+        rows = self.connection.execute(sql, params).fetchall()
+        # One row more than the page tells whether another page follows
+        page = CollectionPage([row_model(row[:-1]) for row in rows[:page_size]])
+        if len(rows) > page_size:
+            last = rows[page_size - 1]
+            page.cursor = (last[-1], last[0])
+        return page
+
+    def pages(self, card_filter: Optional[CardFilter] = None, order_by: str = "id", descending: bool = False,
+              page_size: int = 50) -> Iterator[CollectionPage]:
+        after = None
+        while True:
+            page = self.query(card_filter, order_by, descending, page_size, after)
+            yield page
+            if page.cursor is None:
+                return
+            after = page.cursor
+
+    def explain(self, card_filter: Optional[CardFilter] = None, order_by: str = "id", descending: bool = False) -> List[str]:
+        """SQLite query plan of a page query, to check that it uses an index"""
+        sql, params = self._page_query(card_filter, order_by, descending, 1, None)
+        return [row[-1] for row in self.connection.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def benchmark(card_count: int, path: Union[str, Path], batch_size: int = 100_000) -> Dict[str, float]:
+    """Bulk insert and query latency in milliseconds for a collection of `card_count` cards"""
+    from CardDeck.cardFactory import DeckFactory
+    factory = DeckFactory(0)
+    timings = {}
+    with CardCollection(path) as collection:
+        start = time.perf_counter()
+        for offset in range(0, card_count, batch_size):
+            collection.add_batch(factory.generate(min(batch_size, card_count - offset)))
+        timings["insert_ms"] = (time.perf_counter() - start) * 1000
+        collection.connection.execute("ANALYZE")
+        epic_standard = CardFilter(rarity=CardRarity.EPIC, card_type="Standard", attack=(101, None))
+        start = time.perf_counter()
+        timings["epic_standard_count"] = collection.count(epic_standard)
+        timings["count_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        page = collection.query(epic_standard, order_by="attack", descending=True)
+        timings["first_page_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        page = collection.query(CardFilter(attack=(100, None)), order_by="attack", page_size=50)
+        for _ in range(100):
+            page = collection.query(CardFilter(attack=(100, None)), order_by="attack", page_size=50, after=page.cursor)
+        timings["page_101_ms"] = (time.perf_counter() - start) * 1000 / 101
+        start = time.perf_counter()
+        collection.rarity_counts()
+        timings["rarity_counts_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+    parser = argparse.ArgumentParser(description="Card collection utilities")
+    parser.add_argument("--benchmark", action="store_true", help="measure bulk insert and query latency")
+    parser.add_argument("--cards", type=int, nargs="+", default=[10_000, 1_000_000])
+    args = parser.parse_args()
+    if args.benchmark:
+        for card_count in args.cards:
+            with tempfile.TemporaryDirectory() as directory:
+                timings = benchmark(card_count, Path(directory) / "collection.sqlite3")
+            print(f"{card_count:>8} cards: " + ", ".join(f"{name} {value:.2f}" for name, value in timings.items()))
@@ -0,0 +1,237 @@
+import copy
+import random
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+from CardDeck.cardModel import CardModel, CardRarity, calculate_xp_requirement
+from Container.rngService import RngService
+
+DECK_SIZE = 104
+RARITY_TIER = {rarity: tier for tier, rarity in enumerate(CardRarity, start=1)}
+BUFF_STATS = ("attack", "health", "defense")
+
+def build_deck(rng=random, size: int = DECK_SIZE, stats_rng=None, type_rng=None) -> List[CardModel]:
+    return [CardModel.random(rng=rng, stats_rng=stats_rng, type_rng=type_rng) for _ in range(size)]
+
+def effect_amount(card: CardModel) -> int:
+    """Stat change of a Bonus or Cursed card, rarer cards are stronger"""
+    return 10 * RARITY_TIER[card.rarity]
+
+@dataclass
+class PlayerState:
+    name: str
+    deck: List[CardModel]
+    life: int = 500
+    hand: List[CardModel] = field(default_factory=list)
+    board: List[CardModel] = field(default_factory=list)
+    discard: List[CardModel] = field(default_factory=list)
+
+    def is_defeated(self) -> bool:
+        return self.life <= 0 or (not self.deck and not self.hand and not self.board)
+
+@dataclass(frozen=True)
+class Action:
+    """kind is 'play' (a Standard card to the board), 'bonus', 'curse' or 'end'.
+    hand_index picks the card, target the board card and stat the affected stat ('sleep' for curses)."""
+    kind: str
+    hand_index: int = -1
+    target: int = -1
+    stat: str = ""
+
+END_TURN = Action("end")
+
+@dataclass
+class TurnResult:
+    turn: int
+    player: str
+    drawn: int = 0
+    actions: List[Action] = field(default_factory=list)
+    damage_to_cards: int = 0
+    damage_to_player: int = 0
+    cards_destroyed: int = 0
+
+Policy = Callable[["GameEngine"], Action]
+
+def greedy_policy(engine: "GameEngine") -> Action:
+    """Play Standard cards while there is room, buff the strongest own card, curse the strongest enemy card"""
+    player, enemy = engine.active_player, engine.opponent
+    for index, card in enumerate(player.hand):
+        if card.card_type == "Standard" and len(player.board) < engine.board_size:
+            return Action("play", index)
+        if card.card_type == "Bonus" and player.board:
+            target = max(range(len(player.board)), key=lambda i: player.board[i].attack)
+            return Action("bonus", index, target, "attack")
+        if card.card_type == "Cursed" and enemy.board:
+            target = max(range(len(enemy.board)), key=lambda i: enemy.board[i].attack)
+            stat = "sleep" if enemy.board[target].attack > effect_amount(card) * 3 else "attack"
+            return Action("curse", index, target, stat)
+    return END_TURN
+
+def random_policy(engine: "GameEngine") -> Action:
+    actions = engine.legal_actions()
+    return engine.ai_rng.choice(actions)
+
+class GameEngine:
+    """Headless two player game (no pygame) driven by step(), one call plays one full turn.
+    For search, begin_turn()/legal_actions()/apply() expose the turn action by action and clone() copies the state.
+    With an rng_service, shuffles, card rolls and AI choices each use their own stream of the match seed."""
+    def __init__(self, seed: Optional[int] = None, rng: Optional[random.Random] = None, draw_count: int = 3,
+                 board_size: int = 5, starting_life: int = 500, max_turns: int = 200,
+                 decks: Optional[Tuple[List[CardModel], List[CardModel]]] = None,
+                 policies: Optional[Tuple[Policy, Policy]] = None, rng_service: Optional[RngService] = None):
+        if rng_service is not None:
+            self.rng, self.ai_rng = rng_service.deck, rng_service.ai
+            card_rng, stats_rng, type_rng = rng_service.rarity, rng_service.stats, rng_service.card_types
+        else:
+            self.rng = rng if rng is not None else random.Random(seed)
+            self.ai_rng = card_rng = self.rng
+            stats_rng = type_rng = None
+        self.draw_count = draw_count
+        self.board_size = board_size
+        self.max_turns = max_turns
+        if decks is None:
+            decks = (build_deck(card_rng, stats_rng=stats_rng, type_rng=type_rng),
+                     build_deck(card_rng, stats_rng=stats_rng, type_rng=type_rng))
+        self.players = [PlayerState("player_1", list(decks[0]), starting_life),
+                        PlayerState("player_2", list(decks[1]), starting_life)]
+        for player in self.players:
+            self.rng.shuffle(player.deck)
+        self.policies = policies or (greedy_policy, greedy_policy)
+        self.turn = 0
+        self.active_index = 0
+        self.turn_started = False
+        self.winner: Optional[str] = None
+        self.is_over = False
+        self._result: Optional[TurnResult] = None
+
+    @property
+    def active_player(self) -> PlayerState:
+        return self.players[self.active_index]
+
+    @property
+    def opponent(self) -> PlayerState:
+        return self.players[1 - self.active_index]
+
+    def clone(self) -> "GameEngine":
+        return copy.deepcopy(self)
+
+    def begin_turn(self) -> TurnResult:
+        player = self.active_player
+        self._result = TurnResult(self.turn, player.name)
+        for _ in range(self.draw_count):
+            if not player.deck:
+                break
+            player.hand.append(player.deck.pop())
+            self._result.drawn += 1
+        self.turn_started = True
+        return self._result
+
+    def legal_actions(self) -> List[Action]:
+        player, enemy = self.active_player, self.opponent
+        actions = [END_TURN]
+        for index, card in enumerate(player.hand):
+            if card.card_type == "Standard":
+                if len(player.board) < self.board_size:
+                    actions.append(Action("play", index))
+            elif card.card_type == "Bonus":
+                actions.extend(Action("bonus", index, target, stat)
+                               for target in range(len(player.board)) for stat in BUFF_STATS)
+            elif card.card_type == "Cursed":
+                actions.extend(Action("curse", index, target, stat)
+                               for target in range(len(enemy.board)) for stat in BUFF_STATS + ("sleep",))
+        return actions
+
+    def apply(self, action: Action):
+        """Apply one action of the active player, 'end' resolves combat and passes the turn"""
+        if self.is_over:
+            raise RuntimeError("the game is over")
+        if not self.turn_started:
+            self.begin_turn()
+        player, enemy = self.active_player, self.opponent
+        self._result.actions.append(action)
+        if action.kind == "end":
+            self._resolve_combat()
+            self._end_turn()
+            return
+        card = player.hand.pop(action.hand_index)
+        if action.kind == "play":
+            player.board.append(card)
+            return
+        if action.kind == "bonus":
+            target = player.board[action.target]
+            setattr(target, action.stat, getattr(target, action.stat) + effect_amount(card))
+        elif action.kind == "curse":
+            target = enemy.board[action.target]
+            if action.stat == "sleep":
+                target.is_asleep = True
+            else:
+                setattr(target, action.stat, max(0, getattr(target, action.stat) - effect_amount(card)))
+                if target.health <= 0:
+                    self._destroy(enemy, target)
+        else:
+            raise ValueError(f"unknown action {action.kind!r}")
+        player.discard.append(card)
+
+    def step(self) -> TurnResult:
+        """Play one full turn of the active player with its policy"""
+        result = self.begin_turn()
+        policy = self.policies[self.active_index]
+        while self.turn_started:
+            self.apply(policy(self))
+        return result
+
+    def run(self) -> Optional[str]:
+        """Play until someone wins or max_turns is reached, returns the winner's name (None for a draw)"""
+        while not self.is_over:
+            self.step()
+        return self.winner
+
+    def _resolve_combat(self):
+        player, enemy = self.active_player, self.opponent
+        for attacker in list(player.board):
+            if attacker.is_asleep:
+                # a cursed card skips one attack and wakes up afterwards
+                attacker.is_asleep = False
+                continue
+            if enemy.board:
+                target = min(enemy.board, key=lambda card: card.health)
+                damage = max(1, attacker.attack - target.defense)
+                target.health -= damage
+                self._result.damage_to_cards += damage
+                self._gain_xp(attacker, damage)
+                if target.health <= 0:
+                    self._destroy(enemy, target)
+            else:
+                enemy.life -= attacker.attack
+                self._result.damage_to_player += attacker.attack
+
+    def _destroy(self, owner: PlayerState, card: CardModel):
+        # by identity, another card on the board can have the same stats
+        del owner.board[next(index for index, other in enumerate(owner.board) if other is card)]
+        owner.discard.append(card)
+        self._result.cards_destroyed += 1
+
+    @staticmethod
+    def _gain_xp(card: CardModel, amount: int):
+        card.xp += amount
+        while card.xp >= card.max_xp:
+            card.xp -= card.max_xp
+            card.level += 1
+            card.max_xp = calculate_xp_requirement(card.level)
+            card.attack += max(1, card.attack // 10)
+            card.health += max(1, card.health // 10)
+            card.defense += max(1, card.defense // 10)
+
+    def _end_turn(self):
+        self.turn_started = False
+        self.turn += 1
+        defeated = [player.is_defeated() for player in self.players]
+        if any(defeated):
+            self.is_over = True
+            if not all(defeated):
+                self.winner = self.players[defeated.index(False)].name
+        elif self.turn >= self.max_turns:
+            self.is_over = True
+            lives = [player.life for player in self.players]
+            if lives[0] != lives[1]:
+                self.winner = self.players[lives.index(max(lives))].name
+        self.active_index = 1 - self.active_index
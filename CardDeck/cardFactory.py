@@ -0,0 +1,100 @@
+import numpy as np
+from typing import Dict, Optional, Sequence, Union
+from CardDeck.cardModel import CardModel, CardRarity, CARD_TYPES, STAT_RANGES, calculate_xp_requirement
+from Container.rngService import RngService
+
+RARITIES = list(CardRarity)
+# Stat bounds per rarity index, inclusive: columns attack, health, defense
+STAT_LOW = np.array([[STAT_RANGES[rarity][stat][0] for stat in range(3)] for rarity in RARITIES], dtype=np.int32)
+STAT_HIGH = np.array([[STAT_RANGES[rarity][stat][1] for stat in range(3)] for rarity in RARITIES], dtype=np.int32)
+BASE_LEVEL = np.array([STAT_RANGES[rarity][3] for rarity in RARITIES], dtype=np.int32)
+
+class AliasTable:
+    """Walker/Vose alias table, draws from a discrete distribution in O(1) per sample"""
+    def __init__(self, weights: Sequence[float]):
+        weights = np.asarray(weights, dtype=np.float64)
+        count = len(weights)
+        scaled = weights * count / weights.sum()
+        self.probability = np.ones(count)
+        self.alias = np.arange(count)
+        small = [i for i in range(count) if scaled[i] < 1.0]
+        large = [i for i in range(count) if scaled[i] >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left over is 1.0 up to rounding error
+        for index in small + large:
+            self.probability[index] = 1.0
+
+    def sample(self, generator: np.random.Generator, size: int) -> np.ndarray:
+        columns = generator.integers(0, len(self.probability), size=size)
+        accept = generator.random(size) < self.probability[columns]
+        return np.where(accept, columns, self.alias[columns])
+
+RARITY_ALIAS = AliasTable([rarity.weight for rarity in RARITIES])
+
+class DeckBatch:
+    """Columnar batch of generated cards, CardModel objects are only created for the cards that get used"""
+    def __init__(self, rarity: np.ndarray, card_type: np.ndarray, stats: np.ndarray, level: np.ndarray):
+        self.rarity = rarity
+        self.card_type = card_type
+        self.attack, self.health, self.defense = stats[:, 0], stats[:, 1], stats[:, 2]
+        self.level = level
+        self._models: Dict[int, CardModel] = {}
+
+    def __len__(self):
+        return len(self.rarity)
+
+    def __getitem__(self, index: int) -> CardModel:
+        return self.model(index)
+
+    def __iter__(self):
+        return (self.model(index) for index in range(len(self)))
+
+    def model(self, index: int) -> CardModel:
+        """CardModel of one card, built on first use and kept so changes to it stick"""
+        index = int(index)
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        if index < 0:
+            index += len(self)
+        model = self._models.get(index)
+        if model is None:
+            level = int(self.level[index])
+            model = CardModel(RARITIES[self.rarity[index]], CARD_TYPES[self.card_type[index]],
+                              int(self.attack[index]), int(self.health[index]), int(self.defense[index]),
+                              level, 0, calculate_xp_requirement(level))
+            self._models[index] = model
+        return model
+
+    def card_view(self, index: int, position, scale, face_image: Optional[str] = None, store=None):
+        """On-screen Cards view of one card, needs pygame and a display"""
+        from CardDeck.cardFile import Cards
+        return Cards.from_model(self.model(index), position, scale, face_image, store)
+
+    def rarity_counts(self) -> Dict[CardRarity, int]:
+        counts = np.bincount(self.rarity, minlength=len(RARITIES))
+        return {rarity: int(count) for rarity, count in zip(RARITIES, counts)}
+
+class DeckFactory:
+    """Generates N cards in one vectorized call from a seeded numpy Generator or the deck stream of an RngService"""
+    def __init__(self, generator: Union[np.random.Generator, RngService, int, None] = None):
+        if isinstance(generator, RngService):
+            generator = generator.generator("deck")
+        self.generator = generator if isinstance(generator, np.random.Generator) else np.random.default_rng(generator)
+
+    def generate(self, count: int, card_type: Optional[str] = None) -> DeckBatch:
+        generator = self.generator
+        rarity = RARITY_ALIAS.sample(generator, count).astype(np.int8)
+        if card_type is None:
+            card_types = generator.integers(0, len(CARD_TYPES), size=count).astype(np.int8)
+        else:
+            card_types = np.full(count, CARD_TYPES.index(card_type), dtype=np.int8)
+        stats = generator.integers(STAT_LOW[rarity], STAT_HIGH[rarity] + 1).astype(np.int32)
+        return DeckBatch(rarity, card_types, stats, BASE_LEVEL[rarity])
+
+    def deck(self, size: int = 104) -> DeckBatch:
+        return self.generate(size)
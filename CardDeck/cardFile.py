@@ -1,115 +1,102 @@
 from Container.imports_library import *
 from CardDeck.cardAssets import *
-
-class CardRarity(Enum):
-    COMMON = ("gray", (128, 128, 128), 1.0)
-    UNCOMMON = ("green", (0, 128, 0), 1 / 11)
-    RARE = ("blue", (0, 0, 255), 1 / 121)
-    EPIC = ("purple", (128, 0, 128), 1 / 1331)
-    LEGENDARY = ("gold", (255, 215, 0), 1 / 14641)
-
-    def __init__(self, name: str, color: Tuple[int, int, int], weight: float):
-        self.display_name = name
-        self.color = color
-        self.weight = weight
+from Container.frameCounters import frame_counters
+from CardDeck.cardCache import rotation_cache, tint_cache, face_cache, flip_cache
+from CardDeck.cardStore import CardStore, StoreField, card_store, ANIMATION_TYPES, ANIMATION_CODES
+from CardDeck.cardAnimation import AnimationScheduler, Tween, HoverTween, FlipTween, animations
+from CardDeck.cardModel import *
+from Container.rngService import RngService, get_rng_service
+import numpy as np
 
 class CardAnimator:
-    def __init__(self):
-        self.is_animating = False
-        self.animation_type = None
-        self.animation_progress = 0.0
-        self.animation_duration = 1.0
-        self.hover_phase = 0.0
+    """Animation state of one card, stored in its CardStore slot.
+    The tweens run on the shared AnimationScheduler, nothing has to poll the animator."""
+    is_animating = StoreField("is_animating", bool)
+    is_flipping = StoreField("is_flipping", bool)
+    flip_progress = StoreField("flip_progress", transform=True)
+    face_down = StoreField("face_down", bool, transform=True)
+    hover_phase = StoreField("hover_phase")
+    
+    def __init__(self, store: Optional[CardStore] = None, slot: Optional[int] = None, scheduler: AnimationScheduler = animations):
+        if store is None:
+            store = CardStore(capacity=1)
+            slot = store.allocate()
+        self.store = store
+        self.slot = slot
+        self.scheduler = scheduler
+    
+    @property
+    def animation_type(self) -> Optional[str]:
+        return ANIMATION_TYPES[self.store.animation_type[self.slot]]
+    
+    @animation_type.setter
+    def animation_type(self, animation_type: Optional[str]):
+        self.store.animation_type[self.slot] = ANIMATION_CODES[animation_type]
     
-    def start_flip_animation(self):
+    def start_flip_animation(self, duration: float = 0.4) -> Tween:
         """Start card flip animation"""
-        self.is_animating = True
-        self.animation_type = "flip"
-        self.animation_progress = 0.0
+        return self.scheduler.start(FlipTween(self, duration))
     
-    def start_hover_animation(self):
+    def start_hover_animation(self) -> Tween:
         """Start card hover animation"""
-        self.is_animating = True
-        self.animation_type = "hover"
-        self.animation_progress = 0.0
-        self.hover_phase = 0.0
-    
-    def update_animation(self, dt: float):
-        """Update animation progress"""
-        if self.is_animating:
-            if self.animation_type == "hover":
-                self.hover_phase += dt * 4.0  # Continuous hover animation
-            else:
-                self.animation_progress += dt / self.animation_duration
-                if self.animation_progress >= 1.0:
-                    self.animation_progress = 1.0
-                    self.is_animating = False
+        return self.scheduler.start(HoverTween(self))
+    
+    def stop_animation(self, animation_type: Optional[str] = None):
+        self.scheduler.cancel(self, animation_type)
     
     def get_animation_offset(self) -> Tuple[float, float]:
         """Get current animation offset"""
-        if not self.is_animating:
-            return 0.0, 0.0
-        if self.animation_type == "hover":
-            # Smooth hover animation using sine wave
-            hover_height = math.sin(self.hover_phase) * 5
-            return 0.0, hover_height
-        return 0.0, 0.0
+        return 0.0, float(self.store.hover_offset_y[self.slot])
 
-# Cache for colorized images to avoid repeated colorization
-_colorize_cache = {}
-def colorize(image, newColor):
-    # Create cache key
-    cache_key = (id(image), newColor)
-    if cache_key in _colorize_cache:
-        return _colorize_cache[cache_key]
+def colorize(image, newColor, image_key=None):
+    # Colorized images are cached by a stable asset key, without one the result is not cached
+    if image_key is not None:
+        return tint_cache.colorize(image, newColor, image_key)
     colorized = image.copy()
     colorized.fill((0, 0, 0, 255), None, pygame.BLEND_RGBA_MULT)
     colorized.fill(newColor[0:3] + (0,), None, pygame.BLEND_RGBA_ADD)
-    # Cache the result
-    _colorize_cache[cache_key] = colorized
     return colorized
 
 # card types        
 class Standard_Cards(pygame.sprite.Sprite):
-    level: int = 1
-    attack: int = 0
-    health: int = 0
-    defense: int = 0
-    is_asleep: float = False
+    # Game data lives in the card's CardModel, the sprite is only its on-screen view
+    model: Optional[CardModel] = None
+    level = ModelField("level")
+    attack = ModelField("attack")
+    health = ModelField("health")
+    defense = ModelField("defense")
+    is_asleep = ModelField("is_asleep")
     
-    icon_renderer = IconRenderer(font_size=[12, 12, 12])
+    _icon_renderer: Optional[IconRenderer] = None
     level_original_color = pygame.Color('black')
     level_up_color = pygame.Color('orange')
     level_color = level_original_color
+    face_key = None
     
     def __init__(self):
         super().__init__()
         pass
     
+    @classmethod
+    def load_icon_renderer(cls, font_data: Optional[Tuple[str, bytes]] = None) -> IconRenderer:
+        if Standard_Cards._icon_renderer is None:
+            Standard_Cards._icon_renderer = IconRenderer(font_size=[12, 12, 12], font_data=font_data)
+        return Standard_Cards._icon_renderer
+    
+    @property
+    def icon_renderer(self) -> IconRenderer:
+        # Fonts load with the loading screen or the first card face, not at import
+        return self.load_icon_renderer()
+    
     def generate_stats_for_rarity(self, rarity: CardRarity):
-        stat_ranges = {
-            CardRarity.COMMON: ((5, 50), (30, 80), (5, 30), 1),
-            CardRarity.UNCOMMON: ((30, 70), (60, 120), (20, 50), 1),
-            CardRarity.RARE: ((60, 100), (100, 160), (30, 60), 1),
-            CardRarity.EPIC: ((90, 140), (140, 200), (50, 80), 1),
-            CardRarity.LEGENDARY: ((120, 250), (180, 300), (70, 100), 1)
-        }
-        attack_range, health_range, defense_range, level = stat_ranges.get(rarity, ((5, 50), (30, 80), (5, 30), 1))
-        self.attack=random.randint(attack_range[0], attack_range[1])
-        self.health=random.randint(health_range[0], health_range[1])
-        self.defense=random.randint(defense_range[0], defense_range[1])
-        self.level=level
-        return self.attack, self.health, self.defense, self.level
+        return self.model.generate_stats_for_rarity(rarity)
     
     def Dye_Color(self, face_image, card_canvas):
         if face_image:
             face_rect = self.face_image.get_rect(center=(self.width // 2, self.height // 2))
-            card_canvas.blit(self.face_image, face_rect)
-            # Apply color overlay to dye the card area (not replace the image)
+            # Dye the card area (not replace the image), each (face asset, rarity color) is dyed only once
             dye_color = self.darken_color(self.border_color)
-            overlay = pygame.Surface((self.face_image.get_width(), self.face_image.get_height()), pygame.SRCALPHA)
-            overlay.fill((*dye_color, 80))  # Semi-transparent overlay (80/255 alpha)
-            card_canvas.blit(overlay, face_rect, special_flags=pygame.BLEND_MULT)
+            card_canvas.blit(tint_cache.dyed_face(self.face_image, dye_color, self.face_key), face_rect)
         return card_canvas
     
     def darken_color(self, color):
@@ -124,64 +111,101 @@ class Standard_Cards(pygame.sprite.Sprite):
     
 class Cards(Standard_Cards):
     _placeholder_cache = {}
-    xp: int = 0
-    max_xp: int = 100
-    _needs_redraw: float = False
+    rarity = ModelField("rarity")
+    card_type = ModelField("card_type")
+    xp = ModelField("xp")
+    max_xp = ModelField("max_xp")
+    # content dirty: the face pixels must be rebuilt
+    _needs_redraw: bool = False
+    # transform dirty: the card looks different on screen (moved, turned, flipped or a new face),
+    # the dirty renderer only syncs these cards
+    _transform_dirty = StoreField("transform_dirty", bool)
+    # Transform and movement state are views on the card's CardStore slot
+    x = StoreField("x", transform=True)
+    y = StoreField("y", transform=True)
+    target_x = StoreField("target_x")
+    target_y = StoreField("target_y")
+    prev_x = StoreField("prev_x", transform=True)
+    prev_y = StoreField("prev_y", transform=True)
+    angle = StoreField("angle", transform=True)
+    target_angle = StoreField("target_angle")
+    prev_angle = StoreField("prev_angle", transform=True)
+    move_speed = StoreField("move_speed")
+    rotation_speed = StoreField("rotation_speed")
+    smooth_movement = StoreField("smooth_movement", bool)
+    smooth_rotation = StoreField("smooth_rotation", bool)
+    face_down = StoreField("face_down", bool, transform=True)
+    is_flipping = StoreField("is_flipping", bool)
+    flip_progress = StoreField("flip_progress", transform=True)
     _cached_card_surface = None
+    _face_key = None
+    _face_version: int = 0
+    border_thickness: int = 8
+    # InputDispatcher tracking this card, told whenever the rect moves
+    spatial_index = None
     
-    def __init__(self, position: Tuple[int, int], scale: Tuple[int, int], card_type: Optional[str] = None, face_image: Optional[str] = None):
-        self.x, self.y = position
+    def __init__(self, position: Tuple[int, int], scale: Tuple[int, int], card_type: Optional[str] = None, face_image: Optional[str] = None, store: Optional[CardStore] = None, model: Optional[CardModel] = None, rng: Optional[RngService] = None):
+        self.store = store if store is not None else card_store
+        self.slot = self.store.allocate(*position)
+        self._slots = np.array([self.slot])
         self.width, self.height = scale
         self.original_position = position
-        # Card properties
-        self.card_type = card_type or random.choice(["Standard", "Bonus", "Cursed"])
-        self.rarity = self._determine_rarity()
-        self.max_xp = self.calculate_xp_requirement(self.level)
-        self.generate_stats_for_rarity(rarity=self.rarity)
+        # Card properties, a new card is rolled from the match streams unless an existing model is shown
+        if model is None:
+            rng = rng if rng is not None else get_rng_service()
+            model = CardModel.random(card_type, rng=rng.rarity, stats_rng=rng.stats, type_rng=rng.card_types)
+        self.model = model
         # Visual properties
-        self.border_thickness = 8
         self.border_color = self.rarity.color
         self.is_selected = False
         self.is_hovered = False
-        # Animation system
-        self.animator = CardAnimator()
-        self.angle = 0.0
-        self.target_angle = 0.0
-        self.rotation_speed = 5.0
-        # Movement with easing
-        self.target_x, self.target_y = position
-        self.move_speed = 10.0  # Increased for smoother movement
-        self.smooth_movement = True
+        # Animation, movement with easing and the previous simulation step live in the store
+        self._animator = None
         # Initialize images and cache them
         self._init_images(face_image)
         self.rect = pygame.Rect(self.x - self.width//2, self.y - self.height//2, self.width, self.height)
     
+    @classmethod
+    def from_model(cls, model: CardModel, position: Tuple[int, int], scale: Tuple[int, int], face_image: Optional[str] = None, store: Optional[CardStore] = None) -> "Cards":
+        """View for a stored card, create it when the card comes on screen and release() it when it leaves"""
+        return cls(position=position, scale=scale, face_image=face_image, store=store, model=model)
+    
+    @classmethod
+    def face_size(cls, scale: Tuple[int, int]) -> Tuple[int, int]:
+        return scale[0] - cls.border_thickness * 2, scale[1] - cls.border_thickness * 2
+    
+    @classmethod
+    def image_entries(cls, face_image: str, scale: Tuple[int, int]) -> List[Tuple[str, Tuple[int, int]]]:
+        """(path, size) of every image a card of this size draws, for ImageAssets.preload"""
+        return [(face_image, cls.face_size(scale)), (CARD_BACK_PATH, tuple(scale))]
+    
+    @property
+    def animator(self) -> CardAnimator:
+        # Only created for callers that want the animator API, the card starts its tweens directly
+        if self._animator is None:
+            self._animator = CardAnimator(self.store, self.slot)
+        return self._animator
+    
     def calculate_xp_requirement(self, level: int) -> int:
-        return int(100 * (1.5 ** (level - 1)))
+        return calculate_xp_requirement(level)
     
     def _determine_rarity(self):
-        rarities = list(CardRarity)
-        weights = [r.weight for r in rarities]
-        total_weight = sum(weights)
-        rand_val = random.uniform(0, total_weight)
-        cumulative = 0.0
-        for rarity, weight in zip(rarities, weights):
-            cumulative += weight
-            if rand_val < cumulative:
-                return rarity
-        return CardRarity.COMMON  # fallback
+        return roll_rarity(get_rng_service().rarity)
     
     def _init_images(self, face_image):
-        # Load or create face image
+        # Load or create face image, decoded files and their scaled variants are shared by all cards
+        face_size = self.face_size((self.width, self.height))
+        face = None
         if face_image:
             try:
-                face = pygame.image.load(face_image).convert_alpha()
-                face = pygame.transform.scale(face, (self.width - self.border_thickness * 2, self.height - self.border_thickness * 2))
-            except pygame.error:
-                face = self._get_placeholder_image()
-        else:
+                face = image_assets.load(face_image, face_size)
+                self.face_key = image_assets.asset_key(face_image, face_size)
+            except (pygame.error, OSError):
+                face = None
+        if face is None:
             face = self._get_placeholder_image()
-        self.face_image = face.convert_alpha()
+            self.face_key = ("placeholder", face_size)
+        self.face_image = face
     
     def _get_placeholder_image(self) -> pygame.Surface:
         cache_key = (self.width, self.height)
@@ -189,7 +213,7 @@ class Cards(Standard_Cards):
             surface = pygame.Surface((self.width - self.border_thickness * 2, self.height - self.border_thickness * 2))
             surface.fill(pygame.Color('white'))
             pygame.draw.rect(surface, pygame.Color('brown'), (5, 5, self.width-24, self.height-24), 2)
-            Cards._placeholder_cache[cache_key] = surface
+            Cards._placeholder_cache[cache_key] = surface.convert_alpha()
         return Cards._placeholder_cache[cache_key]
     
     def _create_card_surface(self) -> pygame.Surface:
@@ -206,85 +230,178 @@ class Cards(Standard_Cards):
                 card_canvas.blit(self.face_image, face_rect)
         return card_canvas
     
-    def draw(self, screen: pygame.Surface):
-        # Only recreate surface if something changed
-        if self._needs_redraw or self._cached_card_surface is None:
-            self._cached_card_surface = self._create_card_surface()
+    def _face_signature(self):
+        """Everything that changes the pixels of the card face"""
+        return (self.attack, self.health, self.defense, self.level, tuple(self.level_color),
+                self.rarity, self.border_color, self.card_type, self.face_image, self.width, self.height)
+    
+    def invalidate(self):
+        """Force the card face to be rebuilt on the next draw"""
+        self._needs_redraw = True
+        self._transform_dirty = True
+    
+    def mark_dirty(self):
+        """The card has to be drawn again, e.g. a stat changed. Code changing the CardModel directly calls this."""
+        self._transform_dirty = True
+    
+    def get_face(self) -> pygame.Surface:
+        """Cached card face, rebuilt only when its content changed"""
+        face_key = self._face_signature()
+        if self._needs_redraw or self._cached_card_surface is None or face_key != self._face_key:
+            # Identical cards and sizes seen before share a face from the cache
+            cached = None if self._needs_redraw else face_cache.get(face_key)
+            if cached is None:
+                face = self._create_card_surface()
+                cached = face, face_cache.put(face_key, face)
+                frame_counters.increment("face_rebuilds")
+            self._cached_card_surface, self._face_version = cached
+            self._face_key = face_key
             self._needs_redraw = False
-        # Apply rotation if needed
-        if abs(self.angle) > 0.1:
-            rotated_surface = pygame.transform.rotate(self._cached_card_surface, self.angle)
-            draw_rect = rotated_surface.get_rect(center=(int(self.x), int(self.y)))
-        else:
-            rotated_surface = self._cached_card_surface
-            draw_rect = rotated_surface.get_rect(center=(int(self.x), int(self.y)))
+        return self._cached_card_surface
+    
+    def get_back(self) -> Tuple[pygame.Surface, int]:
+        """Card back at the card size and its version, shared by every card of that size"""
+        signature = ("back", self.width, self.height)
+        cached = face_cache.get(signature)
+        if cached is None:
+            try:
+                back = image_assets.load(CARD_BACK_PATH, (self.width, self.height))
+            except (pygame.error, OSError):
+                back = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+                back.fill(pygame.Color('darkred'))
+            cached = back, face_cache.put(signature, back)
+        return cached
+    
+    def get_visible_face(self) -> Tuple[pygame.Surface, int]:
+        """Front or back, whichever side is up, and its version for the derived caches"""
+        if self.face_down:
+            return self.get_back()
+        return self.get_face(), self._face_version
+    
+    def flip(self, duration: float = 0.4) -> Tween:
+        """Turn the card over, the sides swap halfway through the flip"""
+        return animations.start(FlipTween(self, duration))
+    
+    def prewarm_flip(self):
+        """Build the flip frames of both sides ahead of time, e.g. before flipping a whole hand"""
+        flip_cache.prewarm(self.get_face(), self._face_version)
+        flip_cache.prewarm(*self.get_back())
+    
+    def prewarm_rotations(self, angles):
+        """Render rotations of this face ahead of time, e.g. the angles of a fanned hand"""
+        rotation_cache.prewarm(self.get_face(), self._face_version, angles)
+    
+    def get_render_state(self, alpha: float = 1.0) -> Tuple[pygame.Surface, pygame.Rect]:
+        """Surface to show and where, moving the card just reuses the cached face and rotations.
+        alpha interpolates between the previous and the current simulation step."""
+        face, face_version = self.get_visible_face()
+        if self.is_flipping:
+            # Squashed to the cosine of the flip angle, the side that is up swaps while the card is edge-on
+            face, face_version = flip_cache.get_frame(face, face_version, abs(math.cos(math.pi * self.flip_progress)))
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        angle = self.prev_angle + (self.angle - self.prev_angle) * alpha
+        rotated_surface = rotation_cache.get_rotated(face, face_version, angle)
+        center = (int(x + self.hover_offset[0]), int(y + self.hover_offset[1]))
+        self._transform_dirty = False
+        self._sync_rect()
+        return rotated_surface, rotated_surface.get_rect(center=center)
+    
+    def draw(self, screen: pygame.Surface, alpha: float = 1.0):
+        rotated_surface, draw_rect = self.get_render_state(alpha)
         screen.blit(rotated_surface, draw_rect)
-        # Update collision rect
+        frame_counters.increment("blits")
+    
+    def set_scale(self, scale: Tuple[int, int]):
+        """Resize the card, the face is rendered again from its source image at the new size"""
+        scale = (int(scale[0]), int(scale[1]))
+        if scale == (self.width, self.height):
+            return
+        source = self.face_key[0] if self.face_key and self.face_key[0] != "placeholder" else None
+        self.width, self.height = scale
+        self._init_images(source)
+        self._transform_dirty = True
+        self.rect.size = scale
         self.rect.center = (int(self.x), int(self.y))
+        if self.spatial_index is not None:
+            self.spatial_index.card_moved(self)
+    
+    def scale_position(self, ratio: float):
+        """Move the card with the layout on a window resize, a running move keeps going to its scaled target"""
+        self.x, self.y = self.x * ratio, self.y * ratio
+        self.prev_x, self.prev_y = self.prev_x * ratio, self.prev_y * ratio
+        self.target_x, self.target_y = self.target_x * ratio, self.target_y * ratio
+        self._sync_rect()
+    
+    def _sync_rect(self):
+        # Update collision rect and the spatial index if it moved
+        center = (int(self.x), int(self.y))
+        if self.rect.center != center:
+            self.rect.center = center
+            if self.spatial_index is not None:
+                self.spatial_index.card_moved(self)
+    
+    @property
+    def hover_offset(self) -> Tuple[float, float]:
+        return 0.0, float(self.store.hover_offset_y[self.slot])
     
     def update(self, dt: float):
-        moved = False
-        # Smooth movement with easing
-        if self.smooth_movement:
-            dx = self.target_x - self.x
-            dy = self.target_y - self.y
-            distance = math.sqrt(dx*dx + dy*dy)
-            if distance > 0.5:  # Only move if significant distance
-                # Easing function for smoother movement
-                move_factor = min(1.0, self.move_speed * dt)
-                self.x += dx * move_factor
-                self.y += dy * move_factor
-                moved = True
-        # Smooth rotation with easing
-        angle_diff = self.target_angle - self.angle
-        if abs(angle_diff) > 0.1:
-            self.angle += angle_diff * self.rotation_speed * dt
-            moved = True
-        # Update animation
-        self.animator.update_animation(dt)
-        anim_x, anim_y = self.animator.get_animation_offset()
-        if abs(anim_x) > 0.1 or abs(anim_y) > 0.1:
-            self.x += anim_x * dt
-            self.y += anim_y * dt
-            moved = True
-        # Mark for redraw if position changed significantly
-        if moved:
-            self._needs_redraw = True
+        """Advance one simulation step, dt in seconds. Boards should step the whole CardStore at once instead."""
+        self.store.step(dt, self._slots)
+    
+    def release(self) -> CardModel:
+        """Give the card's slot back to its store once the card leaves the screen, the model stays valid"""
+        animations.cancel(self)
+        self.store.release(self.slot)
+        if self.spatial_index is not None:
+            self.spatial_index.remove(self)
+        return self.model
             
     def handle_event(self, event):
         mouse_pos = pygame.mouse.get_pos()
         mouse_over_card = self.rect.collidepoint(mouse_pos)
         # Handle mouse hover
-        if mouse_over_card != self.is_hovered:
-            self.is_hovered = mouse_over_card
-            if self.is_hovered:
-                self.animator.start_hover_animation()
-            else:
-                self.animator.is_animating = False
+        self.set_hovered(mouse_over_card)
         # Handle mouse clicks
         if event.type == pygame.MOUSEBUTTONDOWN:
             if event.button == 1:  # Left click
-                was_selected = self.is_selected
+                if mouse_over_card and not self.is_selected:
+                    self.on_press(mouse_pos)
                 self.is_selected = mouse_over_card
-                # Only update position if newly selected
-                if self.is_selected and not was_selected:
-                    self.target_x, self.target_y = mouse_pos
         # Handle dragging for selected cards
         elif event.type == pygame.MOUSEMOTION and self.is_selected:
-            self.target_x, self.target_y = mouse_pos
+            self.on_drag(mouse_pos)
         else:
-            self.is_selected = False
-            self.x, self.y = self.target_x, self.target_y
+            self.on_release()
+    
+    def set_hovered(self, hovered: bool):
+        if hovered != self.is_hovered:
+            self.is_hovered = hovered
+            if self.is_hovered:
+                animations.start(HoverTween(self))
+            else:
+                animations.cancel(self, "hover")
+    
+    def on_press(self, mouse_pos: Tuple[int, int]):
+        self.is_selected = True
+        self.target_x, self.target_y = mouse_pos
+    
+    def on_drag(self, mouse_pos: Tuple[int, int]):
+        self.target_x, self.target_y = mouse_pos
+    
+    def on_release(self):
+        self.is_selected = False
+        self.x, self.y = self.prev_x, self.prev_y = self.target_x, self.target_y
     
     def set_position(self, x: int, y: int, smooth: bool = True):
         if smooth:
             self.target_x, self.target_y = x, y
         else:
-            self.x = self.target_x = x
-            self.y = self.target_y = y
+            self.x = self.target_x = self.prev_x = x
+            self.y = self.target_y = self.prev_y = y
     
     def set_rotation(self, angle: float, smooth: bool = True):
         if smooth:
             self.target_angle = angle
         else:
-            self.angle = self.target_angle = angle
\ No newline at end of file
+            self.angle = self.target_angle = self.prev_angle = angle
\ No newline at end of file
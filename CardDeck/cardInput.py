@@ -0,0 +1,95 @@
+from Container.imports_library import *
+from CardDeck.cardSpatial import SpatialHash
+
+def coalesce_motion(events) -> list:
+    """Collapse every run of consecutive MOUSEMOTION events into its last event"""
+    coalesced = []
+    for event in events:
+        if event.type == pygame.MOUSEMOTION and coalesced and coalesced[-1].type == pygame.MOUSEMOTION:
+            coalesced[-1] = event
+        else:
+            coalesced.append(event)
+    return coalesced
+
+class InputDispatcher:
+    """Routes mouse events to the cards under the pointer through a spatial hash of card rects"""
+    def __init__(self, cards=(), cell_size: int = 128):
+        self.spatial_hash = SpatialHash(cell_size)
+        self.cards = []
+        self._z_order: Dict[Any, int] = {}
+        self._next_z = 0
+        self.hovered = None
+        self.selected = None
+        # Called with a card after it was dropped, e.g. to make room for it
+        self.on_drop: Optional[Callable[[Any], None]] = None
+        # Called with the card under the pointer on a right click, e.g. to flip it
+        self.on_right_click: Optional[Callable[[Any], None]] = None
+        for card in cards:
+            self.add(card)
+
+    def add(self, card):
+        """Track a card, cards added later are on top"""
+        self.cards.append(card)
+        self._z_order[card] = self._next_z
+        self._next_z += 1
+        card.spatial_index = self
+        self.spatial_hash.insert(card, card.rect)
+
+    def remove(self, card):
+        if card not in self._z_order:
+            return
+        self.cards.remove(card)
+        del self._z_order[card]
+        self.spatial_hash.remove(card)
+        card.spatial_index = None
+        if self.hovered is card:
+            self.hovered = None
+        if self.selected is card:
+            self.selected = None
+
+    def card_moved(self, card):
+        """Called by a card whenever its rect changed"""
+        if card in self._z_order:
+            self.spatial_hash.move(card, card.rect)
+
+    def card_at(self, position: Tuple[int, int]):
+        """Topmost card under the position, or None"""
+        hits = self.spatial_hash.query_point(*position)
+        if not hits:
+            return None
+        return max(hits, key=self._z_order.__getitem__)
+
+    def dispatch(self, events):
+        for event in coalesce_motion(events):
+            if event.type == pygame.MOUSEMOTION:
+                self._update_hover(event.pos)
+                if self.selected is not None:
+                    self.selected.on_drag(event.pos)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                card = self._update_hover(event.pos)
+                if card is not self.selected:
+                    if self.selected is not None:
+                        self.selected.on_release()
+                    self.selected = card
+                    if card is not None:
+                        card.on_press(event.pos)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
+                card = self._update_hover(event.pos)
+                if card is not None and self.on_right_click is not None:
+                    self.on_right_click(card)
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                if self.selected is not None:
+                    self.selected.on_release()
+                    if self.on_drop is not None:
+                        self.on_drop(self.selected)
+                    self.selected = None
+
+    def _update_hover(self, position: Tuple[int, int]):
+        card = self.card_at(position)
+        if card is not self.hovered:
+            if self.hovered is not None:
+                self.hovered.set_hovered(False)
+            if card is not None:
+                card.set_hovered(True)
+            self.hovered = card
+        return card
@@ -0,0 +1,330 @@
+import math
+import sys
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from CardDeck.cardSpatial import SpatialHash
+
+Placement = Tuple[float, float, float]  # x, y, angle
+# overlaps below this are float noise left by the pushes, not cards on top of each other
+OVERLAP_EPSILON = 1e-6
+
+def fan_angles(count: int, spread: float = 30.0) -> list:
+    """Angles of `count` cards fanned symmetrically over `spread` degrees"""
+    if count <= 1:
+        return [0.0]
+    step = spread / (count - 1)
+    return [spread / 2 - i * step for i in range(count)]
+
+def fan_layout(count: int, center: Tuple[float, float], radius: float = 600.0, spread: float = 30.0) -> List[Placement]:
+    """Hand positions on an arc through `center`, the outer cards sit lower and lean outwards"""
+    placements = []
+    for angle in fan_angles(count, spread):
+        radians = math.radians(angle)
+        placements.append((center[0] - radius * math.sin(radians), center[1] + radius * (1 - math.cos(radians)), angle))
+    return placements
+
+def grid_layout(count: int, origin: Tuple[float, float], card_size: Tuple[int, int], columns: int,
+                gap: Tuple[float, float] = (10.0, 10.0)) -> List[Placement]:
+    """Card centers in rows of `columns`, starting at the top left `origin`"""
+    width, height = card_size
+    return [(origin[0] + (i % columns) * (width + gap[0]) + width / 2,
+             origin[1] + (i // columns) * (height + gap[1]) + height / 2, 0.0) for i in range(count)]
+
+def apply_layout(cards: Sequence, placements: Sequence[Placement], smooth: bool = True):
+    """Send cards to their placements in bulk through set_position/set_rotation"""
+    for card, (x, y, angle) in zip(cards, placements):
+        card.set_position(x, y, smooth=smooth)
+        card.set_rotation(angle, smooth=smooth)
+
+class LayoutSolver:
+    """Pushes overlapping cards apart after a drop or a deal.
+    Broad phase: spatial hash over the cards' target rects, so each card is only tested against its neighbours.
+    Narrow phase: the smaller of the two axis overlaps is resolved, split between both cards unless one is pinned.
+    Cards dealt onto the same spot are first spread on a grid around it, pushing identical rects apart never converges.
+    Moved cards are queued again, step() works through the queue within a time budget so big
+    layouts settle over several frames. Once the queue is empty the moved cards are checked again and the ones
+    still overlapping get another round, up to `max_rounds`. Cards need target_x, target_y, width, height and set_position()."""
+    def __init__(self, cell_size: int = 128, padding: float = 4.0, bounds: Optional[Tuple[float, float, float, float]] = None,
+                 time_budget: float = 0.002, max_pushes: int = 32, max_rounds: int = 16):
+        self.spatial_hash = SpatialHash(cell_size)
+        self.padding = padding
+        self.bounds = bounds  # (left, top, right, bottom) the cards are kept inside
+        self.time_budget = time_budget
+        self.max_pushes = max_pushes
+        self.max_rounds = max_rounds
+        self.pushes = 0
+        self.rounds = 0
+        self._queue = deque()
+        self._queued = set()
+        self._pinned = set()
+        self._push_counts: Dict[object, int] = {}
+        self._order: Dict[object, int] = {}
+        # cards queued since the last settle(), checked for overlaps once the queue runs dry
+        self._touched = set()
+        # cards still overlapping after the last round, the layout is not settled while there are any
+        self.unresolved = set()
+
+    def __contains__(self, card):
+        return card in self._order
+
+    @property
+    def settled(self) -> bool:
+        """True only when nothing is queued and no card was left overlapping"""
+        return not self._queue and not self._touched and not self.unresolved
+
+    @staticmethod
+    def _box(card) -> Tuple[float, float, float, float]:
+        return card.target_x, card.target_y, card.width, card.height
+
+    def _sync(self, card):
+        x, y, width, height = self._box(card)
+        self.spatial_hash.move(card, (x - width / 2, y - height / 2, width, height))
+
+    def add(self, card):
+        self._order.setdefault(card, len(self._order))
+        self._sync(card)
+
+    def remove(self, card):
+        self.spatial_hash.remove(card)
+        self._order.pop(card, None)
+        self._queued.discard(card)
+        self._pinned.discard(card)
+        self._push_counts.pop(card, None)
+        self._touched.discard(card)
+        self.unresolved.discard(card)
+
+    def set_bounds(self, bounds: Optional[Tuple[float, float, float, float]]):
+        self.bounds = bounds
+
+    def settle(self, cards: Iterable, pinned: Iterable = ()):
+        """Queue cards whose targets changed, e.g. a dropped card (pinned, the others make room) or a new deal"""
+        self._pinned = set(pinned)
+        self._push_counts.clear()
+        self.unresolved.clear()
+        self.rounds = 0
+        cards = list(cards)
+        for card in cards:
+            x, y = self._clamp(card, card.target_x, card.target_y)
+            if (x, y) != (card.target_x, card.target_y):
+                card.set_position(x, y)
+            self.add(card)
+        self._spread_stacks(cards)
+        for card in cards:
+            self._enqueue(card)
+
+    def _enqueue(self, card):
+        self._touched.add(card)
+        if card not in self._queued:
+            self._queued.add(card)
+            self._queue.append(card)
+
+    def _spread_stacks(self, cards: Sequence):
+        """Lay cards stacked on (nearly) the same spot out on a grid around it, kept inside the bounds. Pinned cards
+        stay where they are, the others take the grid cells closest to the spot in insertion order."""
+        # Cards closer than a quarter of their size count as one stack, the pushes cannot pull those apart either
+        parent: Dict[object, object] = {}
+        def find(card):
+            while parent.setdefault(card, card) is not card:
+                parent[card] = parent[parent[card]]
+                card = parent[card]
+            return card
+        pending = list(cards)
+        seen = set(pending)
+        while pending:
+            card = pending.pop()
+            x, y = card.target_x, card.target_y
+            reach_x, reach_y = card.width / 4, card.height / 4
+            for other in self.spatial_hash.query_rect((x - reach_x, y - reach_y, 2 * reach_x, 2 * reach_y)):
+                if other is not card and abs(other.target_x - x) < reach_x and abs(other.target_y - y) < reach_y:
+                    parent[find(other)] = find(card)
+                    if other not in seen:
+                        seen.add(other)
+                        pending.append(other)
+        stacks: Dict[object, list] = {}
+        for card in seen:
+            stacks.setdefault(find(card), []).append(card)
+        for stack in stacks.values():
+            if len(stack) < 2:
+                continue
+            stack.sort(key=lambda card: (card not in self._pinned, self._order[card]))
+            spot_x, spot_y = stack[0].target_x, stack[0].target_y
+            cell_width = max(card.width for card in stack) + self.padding
+            cell_height = max(card.height for card in stack) + self.padding
+            columns = math.ceil(math.sqrt(len(stack)))
+            if self.bounds is not None:
+                # as many rows as fit, wider rows instead of running off the bottom
+                max_rows = max(1, int((self.bounds[3] - self.bounds[1] + self.padding) // cell_height))
+                columns = max(columns, math.ceil(len(stack) / max_rows))
+            rows = math.ceil(len(stack) / columns)
+            # grid centered on the spot, shifted inside the bounds where it fits
+            half_width, half_height = (columns * cell_width - self.padding) / 2, (rows * cell_height - self.padding) / 2
+            center_x, center_y = spot_x, spot_y
+            if self.bounds is not None:
+                left, top, right, bottom = self.bounds
+                center_x = min(max(center_x, left + half_width), max(left + half_width, right - half_width))
+                center_y = min(max(center_y, top + half_height), max(top + half_height, bottom - half_height))
+            cells = [(center_x + (i % columns - (columns - 1) / 2) * cell_width, center_y + (i // columns - (rows - 1) / 2) * cell_height)
+                     for i in range(len(stack))]
+            cells.sort(key=lambda cell: (cell[0] - spot_x) ** 2 + (cell[1] - spot_y) ** 2)
+            for card, (x, y) in zip(stack, cells):
+                if card in self._pinned:
+                    continue
+                x, y = self._clamp(card, x, y)
+                card.set_position(x, y)
+                self._sync(card)
+
+    def _overlapping(self, card) -> bool:
+        """Whether the card's target rect still overlaps another card's (the padding is not counted)"""
+        x, y, width, height = self._box(card)
+        for other in self.spatial_hash.query_rect((x - width / 2, y - height / 2, width, height)):
+            if other is card:
+                continue
+            ox, oy, other_width, other_height = self._box(other)
+            if (width + other_width) / 2 - abs(ox - x) > OVERLAP_EPSILON and (height + other_height) / 2 - abs(oy - y) > OVERLAP_EPSILON:
+                return True
+        return False
+
+    def _clamp(self, card, x: float, y: float) -> Tuple[float, float]:
+        if self.bounds is None:
+            return x, y
+        left, top, right, bottom = self.bounds
+        half_width, half_height = card.width / 2, card.height / 2
+        x = min(max(x, left + half_width), max(left + half_width, right - half_width))
+        y = min(max(y, top + half_height), max(top + half_height, bottom - half_height))
+        return x, y
+
+    def _push(self, card, dx: float, dy: float) -> Tuple[float, float]:
+        """Move a card's target, returns how far it really moved after clamping to the bounds"""
+        start_x, start_y = card.target_x, card.target_y
+        x, y = self._clamp(card, start_x + dx, start_y + dy)
+        if (x, y) == (start_x, start_y):
+            return 0.0, 0.0
+        card.set_position(x, y)
+        self._sync(card)
+        self._push_counts[card] = self._push_counts.get(card, 0) + 1
+        self.pushes += 1
+        if self._push_counts[card] < self.max_pushes:
+            self._enqueue(card)
+        else:
+            # Not queued again this round, but checked once the queue is empty
+            self._touched.add(card)
+        return x - start_x, y - start_y
+
+    def _separate(self, card, other) -> bool:
+        ax, ay, aw, ah = self._box(card)
+        bx, by, bw, bh = self._box(other)
+        dx, dy = bx - ax, by - ay
+        overlap_x = (aw + bw) / 2 + self.padding - abs(dx)
+        overlap_y = (ah + bh) / 2 + self.padding - abs(dy)
+        if overlap_x <= OVERLAP_EPSILON or overlap_y <= OVERLAP_EPSILON:
+            return False
+        card_pinned, other_pinned = card in self._pinned, other in self._pinned
+        if card_pinned and other_pinned:
+            return False
+        # Cards on the same spot are split by insertion order so the result does not depend on set order
+        tie = 1.0 if self._order[other] > self._order[card] else -1.0
+        if overlap_x < overlap_y:
+            push_x, push_y = math.copysign(overlap_x, dx) if dx else overlap_x * tie, 0.0
+        else:
+            push_x, push_y = 0.0, math.copysign(overlap_y, dy) if dy else overlap_y * tie
+        # Whatever a card cannot move because it is against the bounds, the other one moves instead,
+        # a pinned card only gives way when the other one is stuck
+        if card_pinned:
+            moved_x, moved_y = self._push(other, push_x, push_y)
+            self._push(card, moved_x - push_x, moved_y - push_y)
+        elif other_pinned:
+            moved_x, moved_y = self._push(card, -push_x, -push_y)
+            self._push(other, push_x + moved_x, push_y + moved_y)
+        else:
+            moved_x, moved_y = self._push(card, -push_x / 2, -push_y / 2)
+            self._push(other, push_x + moved_x, push_y + moved_y)
+        return True
+
+    def step(self, time_budget: Optional[float] = None) -> bool:
+        """Resolve queued overlaps until the budget runs out, True once the layout has settled"""
+        deadline = time.perf_counter() + (self.time_budget if time_budget is None else time_budget)
+        while self._queue or self._touched:
+            while self._queue:
+                card = self._queue.popleft()
+                self._queued.discard(card)
+                if card not in self._order:
+                    continue
+                x, y, width, height = self._box(card)
+                padding = self.padding
+                area = (x - width / 2 - padding, y - height / 2 - padding, width + 2 * padding, height + 2 * padding)
+                for other in sorted(self.spatial_hash.query_rect(area), key=self._order.__getitem__):
+                    if other is not card:
+                        self._separate(card, other)
+                if time.perf_counter() >= deadline:
+                    return False
+            # Cards that hit max_pushes or were stuck against the bounds left the queue, check they are really clear
+            overlapping = sorted((card for card in self._touched if self._overlapping(card)), key=self._order.__getitem__)
+            self._touched.clear()
+            if not overlapping:
+                break
+            self.rounds += 1
+            if self.rounds > self.max_rounds:
+                self.unresolved = set(overlapping)
+                break
+            for card in overlapping:
+                self._push_counts.pop(card, None)
+                self._enqueue(card)
+            if time.perf_counter() >= deadline:
+                return False
+        return self.settled
+
+    def solve(self, max_time: float = 1.0) -> bool:
+        """Settle everything queued in one go, for deals and tools. False when cards still overlap,
+        e.g. the bounds are too small for them, settle() them again to retry."""
+        return self.step(max_time)
+
+def overlapping_pairs(cards: Sequence) -> int:
+    """Number of card pairs whose target rects overlap, for checking a layout"""
+    spatial_hash = SpatialHash()
+    for card in cards:
+        spatial_hash.insert(card, (card.target_x - card.width / 2, card.target_y - card.height / 2, card.width, card.height))
+    index = {card: i for i, card in enumerate(cards)}
+    pairs = 0
+    for card in cards:
+        for other in spatial_hash.query_rect(spatial_hash.bounds_of(card)[:2] + (card.width, card.height)):
+            if index[other] > index[card] \
+                    and (card.width + other.width) / 2 - abs(other.target_x - card.target_x) > OVERLAP_EPSILON \
+                    and (card.height + other.height) / 2 - abs(other.target_y - card.target_y) > OVERLAP_EPSILON:
+                pairs += 1
+    return pairs
+
+class LayoutBox:
+    """Bare card rect for layout checks and tools, moves straight to its target"""
+    def __init__(self, x: float, y: float, width: int = 100, height: int = 125):
+        self.target_x, self.target_y = x, y
+        self.width, self.height = width, height
+
+    def set_position(self, x: float, y: float, smooth: bool = True):
+        self.target_x, self.target_y = x, y
+
+def check_stacked(count: int, bounds: Optional[Tuple[float, float, float, float]] = None) -> Tuple[bool, int]:
+    """Deal `count` cards onto one spot and solve, returns (solve() result, overlapping pairs left)"""
+    center = ((bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2) if bounds else (400.0, 300.0)
+    cards = [LayoutBox(*center) for _ in range(count)]
+    solver = LayoutSolver(bounds=bounds)
+    solver.settle(cards)
+    settled = solver.solve()
+    return settled, overlapping_pairs(cards)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Layout solver utilities")
+    parser.add_argument("--check", action="store_true", help="stack cards on one spot and check the solver separates them")
+    args = parser.parse_args()
+    if args.check:
+        failed = False
+        for count, bounds in ((10, None), (104, None), (10, (0, 0, 800, 600)), (10, (0, 0, 1280, 720)), (104, (0, 0, 1920, 1080))):
+            settled, pairs = check_stacked(count, bounds)
+            print(f"{count:>4} cards, bounds {bounds}: settled {settled}, {pairs} overlapping pairs")
+            failed |= pairs > 0 or not settled
+        # 104 cards do not fit in 800x600, the solver has to say so instead of claiming it settled
+        settled, pairs = check_stacked(104, (0, 0, 800, 600))
+        print(f" 104 cards, bounds (0, 0, 800, 600): settled {settled}, {pairs} overlapping pairs (does not fit)")
+        failed |= settled != (pairs == 0)
+        sys.exit(1 if failed else 0)
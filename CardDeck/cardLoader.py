@@ -0,0 +1,87 @@
+from Container.imports_library import *
+import queue
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from CardDeck.cardAssets import ImageAssets, image_assets
+
+class AssetLoader:
+    """Decodes images and other slow, thread-safe work on a thread pool (pygame.image.load releases the GIL).
+    Results come back through a queue and are finished on the main thread by poll(), which also runs
+    the main-thread jobs (surface conversion, fonts, menus, cards) a few at a time within a frame budget."""
+    def __init__(self, assets: ImageAssets = image_assets, workers: int = 4):
+        self.assets = assets
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset-loader")
+        self._finished: "queue.Queue[Tuple[Callable[[Any], Any], Future, str]]" = queue.Queue()
+        # Main-thread jobs run in order, once every worker task submitted before them has been finished
+        self._main_jobs = deque()
+        self._in_flight = 0
+        self.total = 0
+        self.completed = 0
+        self.errors: List[str] = []
+
+    def submit(self, work: Callable[..., Any], finish: Callable[[Any], Any], *args, description: str = "") -> Future:
+        """Run `work(*args)` on a worker thread and `finish(result)` on the main thread"""
+        self.total += 1
+        self._in_flight += 1
+        future = self._pool.submit(work, *args)
+        description = description or getattr(work, "__name__", "asset")
+        future.add_done_callback(lambda done: self._finished.put((finish, done, description)))
+        return future
+
+    def load_image(self, path) -> Optional[Future]:
+        """Decode an image file in the background, it is converted and shared through the asset store when finished"""
+        if self.assets.has_source(path):
+            return None
+        path = str(path).replace("\\", "/")
+        return self.submit(pygame.image.load, lambda surface: self.assets.add_source(path, surface), path, description=path)
+
+    def call_soon(self, job: Callable[..., Any], *args):
+        """Queue a job that has to run on the main thread, e.g. building a menu or a card"""
+        self.total += 1
+        self._main_jobs.append((job, args))
+
+    @property
+    def progress(self) -> Tuple[int, int]:
+        return self.completed, self.total
+
+    @property
+    def done(self) -> bool:
+        return self.completed >= self.total
+
+    def _complete(self, job: Callable[..., Any], args: tuple, description: str):
+        try:
+            job(*args)
+        except Exception as error:
+            # A missing asset should not stop the game from loading, cards fall back to placeholders
+            self.errors.append(f"{description}: {error}")
+            print(f"Loading {description} failed: {error}")
+        self.completed += 1
+
+    def poll(self, budget: float = 0.008) -> int:
+        """Finish loaded work on the main thread for up to `budget` seconds, at least one item per call"""
+        deadline = time.perf_counter() + budget
+        handled = 0
+        while True:
+            try:
+                finish, future, description = self._finished.get_nowait()
+            except queue.Empty:
+                if self._in_flight or not self._main_jobs:
+                    break
+                job, args = self._main_jobs.popleft()
+                self._complete(job, args, getattr(job, "__name__", "job"))
+            else:
+                self._in_flight -= 1
+                self._complete(lambda: finish(future.result()), (), description)
+            handled += 1
+            if time.perf_counter() >= deadline:
+                break
+        return handled
+
+    def wait(self):
+        """Block until everything is loaded, for tools and tests without a loading screen"""
+        while not self.done:
+            if not self.poll(budget=1.0):
+                time.sleep(0.001)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
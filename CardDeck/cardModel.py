@@ -0,0 +1,99 @@
+import bisect
+import itertools
+import random
+from enum import Enum
+from typing import Optional, Tuple
+
+class CardRarity(Enum):
+    COMMON = ("gray", (128, 128, 128), 1.0)
+    UNCOMMON = ("green", (0, 128, 0), 1 / 11)
+    RARE = ("blue", (0, 0, 255), 1 / 121)
+    EPIC = ("purple", (128, 0, 128), 1 / 1331)
+    LEGENDARY = ("gold", (255, 215, 0), 1 / 14641)
+
+    def __init__(self, name: str, color: Tuple[int, int, int], weight: float):
+        self.display_name = name
+        self.color = color
+        self.weight = weight
+
+CARD_TYPES = ("Standard", "Bonus", "Cursed")
+
+# (attack, health, defense, level) per rarity
+STAT_RANGES = {
+    CardRarity.COMMON: ((5, 50), (30, 80), (5, 30), 1),
+    CardRarity.UNCOMMON: ((30, 70), (60, 120), (20, 50), 1),
+    CardRarity.RARE: ((60, 100), (100, 160), (30, 60), 1),
+    CardRarity.EPIC: ((90, 140), (140, 200), (50, 80), 1),
+    CardRarity.LEGENDARY: ((120, 250), (180, 300), (70, 100), 1)
+}
+
+def calculate_xp_requirement(level: int) -> int:
+    return int(100 * (1.5 ** (level - 1)))
+
+# Rarity table is built once, rolling a rarity is a single bisect
+_RARITIES = list(CardRarity)
+_CUMULATIVE_WEIGHTS = list(itertools.accumulate(rarity.weight for rarity in _RARITIES))
+
+def roll_rarity(rng=random) -> CardRarity:
+    rand_val = rng.uniform(0, _CUMULATIVE_WEIGHTS[-1])
+    index = bisect.bisect_right(_CUMULATIVE_WEIGHTS, rand_val)
+    return _RARITIES[index] if index < len(_RARITIES) else CardRarity.COMMON  # fallback
+
+class CardModel:
+    """Game data of one card, no pygame objects so collections of any size stay small"""
+    __slots__ = ("rarity", "card_type", "attack", "health", "defense", "level", "xp", "max_xp", "is_asleep")
+
+    def __init__(self, rarity: CardRarity, card_type: str, attack: int = 0, health: int = 0, defense: int = 0,
+                 level: int = 1, xp: int = 0, max_xp: Optional[int] = None, is_asleep: bool = False):
+        self.rarity = rarity
+        self.card_type = card_type
+        self.attack = attack
+        self.health = health
+        self.defense = defense
+        self.level = level
+        self.xp = xp
+        self.max_xp = max_xp if max_xp is not None else calculate_xp_requirement(level)
+        self.is_asleep = is_asleep
+
+    def __repr__(self):
+        return (f"CardModel({self.rarity.name}, {self.card_type!r}, attack={self.attack}, health={self.health}, "
+                f"defense={self.defense}, level={self.level}, xp={self.xp})")
+
+    def same_stats(self, other: "CardModel") -> bool:
+        """True when both cards hold the same data. Cards compare by identity, two copies of a card stay two cards"""
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    @classmethod
+    def random(cls, card_type: Optional[str] = None, rng=random, stats_rng=None, type_rng=None) -> "CardModel":
+        """Roll a card the way the deck does: random type, weighted rarity, stats for that rarity.
+        `rng` rolls the rarity, the type comes from `type_rng` and the stats from `stats_rng` when given,
+        so each can use its own stream. Without them `rng` rolls everything."""
+        card_type = card_type or (type_rng or rng).choice(CARD_TYPES)
+        model = cls(roll_rarity(rng), card_type)
+        model.generate_stats_for_rarity(model.rarity, stats_rng or rng)
+        return model
+
+    def generate_stats_for_rarity(self, rarity: CardRarity, rng=random):
+        attack_range, health_range, defense_range, level = STAT_RANGES.get(rarity, STAT_RANGES[CardRarity.COMMON])
+        self.attack = rng.randint(attack_range[0], attack_range[1])
+        self.health = rng.randint(health_range[0], health_range[1])
+        self.defense = rng.randint(defense_range[0], defense_range[1])
+        self.level = level
+        return self.attack, self.health, self.defense, self.level
+
+class ModelField:
+    """Attribute of a card view that lives in its CardModel"""
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        return getattr(view.model, self.name)
+
+    def __set__(self, view, value):
+        setattr(view.model, self.name, value)
+        # Views that cache a rendering of the model are told it changed
+        mark_dirty = getattr(view, "mark_dirty", None)
+        if mark_dirty is not None:
+            mark_dirty()
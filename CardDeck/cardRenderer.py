@@ -0,0 +1,73 @@
+from Container.imports_library import *
+import numpy as np
+from Container.frameCounters import frame_counters
+
+class CardSprite(pygame.sprite.DirtySprite):
+    """Screen view of a card for the dirty-rect renderer"""
+    def __init__(self, card):
+        super().__init__()
+        self.card = card
+        self.image, self.rect = card.get_render_state()
+        self.dirty = 1
+
+    def sync(self, alpha: float = 1.0) -> bool:
+        # Only flag the sprite when the card looks different or moved
+        image, rect = self.card.get_render_state(alpha)
+        if image is not self.image or rect != self.rect:
+            self.image = image
+            self.rect = rect
+            self.dirty = 1
+            return True
+        return False
+
+class DirtyCardRenderer:
+    """Gameplay renderer that restores the background only under the cards that changed
+    and returns the changed rects for pygame.display.update"""
+    def __init__(self, background: pygame.Surface, cards=()):
+        self.group = pygame.sprite.LayeredDirty()
+        # Never fall back to full screen updates, an idle board should cost nothing
+        self.group.set_timing_threshold(float("inf"))
+        self._sprites = {}
+        # sprites per store slot, the store's transform_dirty flags say which cards to sync
+        self._slots: Dict[Any, Dict[int, CardSprite]] = {}
+        # sprites that changed on their last sync, synced again until they settle
+        # (the interpolated position keeps moving for a frame after the simulation stopped)
+        self._settling = set()
+        self.set_background(background)
+        for card in cards:
+            self.add(card)
+
+    def add(self, card):
+        sprite = CardSprite(card)
+        self._sprites[card] = sprite
+        self._slots.setdefault(card.store, {})[card.slot] = sprite
+        self._settling.add(sprite)
+        self.group.add(sprite)
+
+    def remove(self, card):
+        sprite = self._sprites.pop(card, None)
+        if sprite is not None:
+            self._slots[card.store].pop(card.slot, None)
+            self._settling.discard(sprite)
+            sprite.kill()
+
+    def set_background(self, background: pygame.Surface):
+        self.background = background
+        self.group.clear(None, background)
+        self.repaint()
+
+    def repaint(self):
+        """Redraw everything on the next frame, e.g. after a menu covered the board"""
+        self.group.repaint_rect(self.background.get_rect())
+
+    def draw(self, screen: pygame.Surface, alpha: float = 1.0) -> list:
+        # Only cards flagged since the last frame and the ones still settling are synced, an idle board syncs nothing
+        for store, sprites in self._slots.items():
+            for slot in np.flatnonzero(store.transform_dirty[:store.count]):
+                sprite = sprites.get(int(slot))
+                if sprite is not None:
+                    self._settling.add(sprite)
+        synced = self._settling
+        self._settling = {sprite for sprite in synced if sprite.sync(alpha)}
+        frame_counters.increment("blits", sum(1 for sprite in synced if sprite.dirty))
+        return self.group.draw(screen)
@@ -0,0 +1,248 @@
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from CardDeck.cardModel import CardModel, CardRarity, CARD_TYPES
+
+SAVE_VERSION = 2
+SAVE_MAGIC = b"CGSV"
+JOURNAL_MAGIC = b"CGJL"
+SLOT_COUNT = 10
+# Autosaves are folded into a new snapshot once the journal outgrows both this and the snapshot
+JOURNAL_COMPACT_BYTES = 64 * 1024
+RARITIES = list(CardRarity)
+RARITY_INDEX = {rarity: index for index, rarity in enumerate(RARITIES)}
+TYPE_INDEX = {card_type: index for index, card_type in enumerate(CARD_TYPES)}
+
+# magic, version, snapshot generation, card count, match seed
+HEADER = struct.Struct("<4sHHIQ")
+# magic, generation of the snapshot the journal belongs to
+JOURNAL_HEADER = struct.Struct("<4sH")
+# rarity, type, flags, attack, health, defense, level, xp, max_xp, x, y, angle
+RECORD = struct.Struct("<BBBxiiiHxxIIfff")
+# card index followed by its full record, an index past the end appends a card
+JOURNAL_ENTRY = struct.Struct("<I" + RECORD.format[1:])
+FLAG_ASLEEP = 1
+
+class SaveFormatError(ValueError):
+    pass
+
+def save_dir() -> Path:
+    if os.environ.get("CARDGAME_SAVE_DIR"):
+        return Path(os.environ["CARDGAME_SAVE_DIR"])
+    data_home = os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share"
+    return Path(data_home) / "CardGame" / "saves"
+
+def pack_card(model: CardModel, x: float = 0.0, y: float = 0.0, angle: float = 0.0) -> tuple:
+    """Record fields of one card in RECORD order"""
+    return (RARITY_INDEX[model.rarity], TYPE_INDEX[model.card_type], FLAG_ASLEEP if model.is_asleep else 0,
+            model.attack, model.health, model.defense, model.level, model.xp, model.max_xp, x, y, angle)
+
+def unpack_card(fields: tuple) -> Tuple[CardModel, Tuple[float, float, float]]:
+    rarity, card_type, flags, attack, health, defense, level, xp, max_xp, x, y, angle = fields
+    model = CardModel(RARITIES[rarity], CARD_TYPES[card_type], attack, health, defense, level, xp, max_xp, bool(flags & FLAG_ASLEEP))
+    return model, (x, y, angle)
+
+class SaveData:
+    """Memory-mapped save, records are decoded only when accessed and journal entries override them"""
+    def __init__(self, path: Path, journal_path: Path):
+        self._map = None
+        self._file = open(path, "rb")
+        try:
+            # mmap cannot map an empty file, short files are rejected before mapping
+            if os.fstat(self._file.fileno()).st_size < HEADER.size:
+                raise SaveFormatError(f"{path} is too short to be a save")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.generation, self.base_count, self.seed = HEADER.unpack_from(self._map, 0)
+            if magic != SAVE_MAGIC or version != SAVE_VERSION:
+                raise SaveFormatError(f"{path} is not a version {SAVE_VERSION} save")
+            if len(self._map) < HEADER.size + self.base_count * RECORD.size:
+                raise SaveFormatError(f"{path} is truncated")
+            self._overrides: Dict[int, tuple] = {}
+            self._decoded: Dict[int, Tuple[CardModel, Tuple[float, float, float]]] = {}
+            self.count = self.base_count
+            self._read_journal(journal_path)
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_journal(self, journal_path: Path):
+        if not journal_path.exists():
+            return
+        data = journal_path.read_bytes()
+        if len(data) < JOURNAL_HEADER.size:
+            return
+        magic, generation = JOURNAL_HEADER.unpack_from(data, 0)
+        # A journal left behind by a crash during save() belongs to the previous snapshot
+        if magic != JOURNAL_MAGIC or generation != self.generation:
+            return
+        # A crash can leave a partial last entry, it is ignored
+        for offset in range(JOURNAL_HEADER.size, len(data) - JOURNAL_ENTRY.size + 1, JOURNAL_ENTRY.size):
+            index, *fields = JOURNAL_ENTRY.unpack_from(data, offset)
+            # New cards are journaled in order right after the last one, anything further is corrupt
+            if index > self.count:
+                raise SaveFormatError(f"{journal_path} has an entry for card {index} but the save has {self.count}")
+            self._overrides[index] = tuple(fields)
+            self.count = max(self.count, index + 1)
+
+    def __len__(self):
+        return self.count
+
+    def record(self, index: int) -> tuple:
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        fields = self._overrides.get(index)
+        if fields is None:
+            fields = RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+        return fields
+
+    def __getitem__(self, index: int) -> Tuple[CardModel, Tuple[float, float, float]]:
+        """(CardModel, (x, y, angle)) of one card"""
+        card = self._decoded.get(index)
+        if card is None:
+            card = unpack_card(self.record(index))
+            self._decoded[index] = card
+        return card
+
+    def __iter__(self) -> Iterator[Tuple[CardModel, Tuple[float, float, float]]]:
+        return (self[index] for index in range(self.count))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SaveSlot:
+    """One of the 10 save slots: a compact binary snapshot plus an append-only journal for autosaves"""
+    def __init__(self, slot: int, directory: Optional[Path] = None):
+        if not 1 <= slot <= SLOT_COUNT:
+            raise ValueError(f"save slot must be between 1 and {SLOT_COUNT}")
+        self.slot = slot
+        self.directory = Path(directory) if directory else save_dir()
+        self.path = self.directory / f"slot_{slot:02d}.sav"
+        self.journal_path = self.directory / f"slot_{slot:02d}.journal"
+        self.count = 0
+        self.generation: Optional[int] = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _read_generation(self) -> Optional[int]:
+        """Generation of the snapshot on disk, None without a readable one"""
+        try:
+            with open(self.path, "rb") as file:
+                header = file.read(HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(header) < HEADER.size:
+            return None
+        magic, version, generation, _, _ = HEADER.unpack(header)
+        return generation if magic == SAVE_MAGIC and version == SAVE_VERSION else None
+
+    def save(self, records: Iterable[tuple], seed: int = 0):
+        """Write a full snapshot with one bulk write and atomically replace the old one, the journal is folded in.
+        Every snapshot gets a new generation, a journal of an older one is ignored on load."""
+        records = list(records)
+        previous = self.generation if self.generation is not None else self._read_generation()
+        generation = ((previous or 0) + 1) % 0x10000
+        buffer = bytearray(HEADER.size + len(records) * RECORD.size)
+        HEADER.pack_into(buffer, 0, SAVE_MAGIC, SAVE_VERSION, generation, len(records), seed)
+        for index, fields in enumerate(records):
+            RECORD.pack_into(buffer, HEADER.size + index * RECORD.size, *fields)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "wb") as file:
+            file.write(buffer)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+        self.count = len(records)
+        self.generation = generation
+
+    def append_changes(self, changes: Dict[int, tuple]) -> bool:
+        """Autosave only the changed records, the cost grows with the changes and not with the deck.
+        Returns True when the journal got big enough to be folded into a new snapshot."""
+        if not changes:
+            return False
+        if self.generation is None:
+            self.generation = self._read_generation()
+            if self.generation is None:
+                raise SaveFormatError(f"{self.path} has no snapshot to journal against")
+        journal_size = self.journal_path.stat().st_size if self.journal_path.exists() else 0
+        header = journal_size < JOURNAL_HEADER.size
+        buffer = bytearray(JOURNAL_HEADER.size * header + len(changes) * JOURNAL_ENTRY.size)
+        if header:
+            JOURNAL_HEADER.pack_into(buffer, 0, JOURNAL_MAGIC, self.generation)
+        for position, (index, fields) in enumerate(sorted(changes.items())):
+            JOURNAL_ENTRY.pack_into(buffer, JOURNAL_HEADER.size * header + position * JOURNAL_ENTRY.size, index, *fields)
+        with open(self.journal_path, "wb" if header else "ab") as file:
+            file.write(buffer)
+            file.flush()
+            os.fsync(file.fileno())
+        journal_size = journal_size * (not header) + len(buffer)
+        if journal_size > max(JOURNAL_COMPACT_BYTES, self.path.stat().st_size):
+            self.compact()
+            return True
+        return False
+
+    def compact(self):
+        """Fold the journal into a new snapshot"""
+        with self.load() as data:
+            records = [data.record(index) for index in range(len(data))]
+            seed = data.seed
+        self.save(records, seed)
+
+    def load(self) -> SaveData:
+        data = SaveData(self.path, self.journal_path)
+        self.count = len(data)
+        self.generation = data.generation
+        return data
+
+def benchmark(card_count: int, directory: Path, changes: int = 10) -> Dict[str, float]:
+    """Save, autosave and load latency in milliseconds for a collection of `card_count` cards"""
+    import random
+    rng = random.Random(0)
+    records = [pack_card(CardModel.random(rng=rng), rng.uniform(0, 1280), rng.uniform(0, 720)) for _ in range(card_count)]
+    slot = SaveSlot(1, directory)
+    timings = {}
+    start = time.perf_counter()
+    slot.save(records)
+    timings["save_ms"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    slot.append_changes({rng.randrange(card_count): records[0] for _ in range(changes)})
+    timings["autosave_ms"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    with slot.load() as data:
+        timings["load_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        data[card_count // 2]
+        timings["first_card_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in data:
+            pass
+        timings["decode_all_ms"] = (time.perf_counter() - start) * 1000
+    timings["file_bytes"] = slot.path.stat().st_size
+    return timings
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+    parser = argparse.ArgumentParser(description="Save format utilities")
+    parser.add_argument("--benchmark", action="store_true", help="measure save/autosave/load latency")
+    parser.add_argument("--cards", type=int, nargs="+", default=[104, 10_000, 100_000])
+    args = parser.parse_args()
+    if args.benchmark:
+        for card_count in args.cards:
+            with tempfile.TemporaryDirectory() as directory:
+                timings = benchmark(card_count, Path(directory))
+            print(f"{card_count:>8} cards: " + ", ".join(f"{name} {value:.2f}" for name, value in timings.items()))
@@ -0,0 +1,94 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Set, Tuple
+
+class SpatialHash:
+    """Uniform grid over item rects, an item is only re-bucketed when its cell range changes.
+    Rects are anything with left/top/right/bottom (pygame.Rect) or (left, top, width, height) tuples."""
+    def __init__(self, cell_size: int = 128):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set] = defaultdict(set)
+        self._items: Dict[object, Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]] = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    @staticmethod
+    def _bounds(rect) -> Tuple[int, int, int, int]:
+        if isinstance(rect, tuple):
+            left, top, width, height = rect
+            return int(left), int(top), int(left + width), int(top + height)
+        return rect.left, rect.top, rect.right, rect.bottom
+
+    def _cell_range(self, bounds) -> Tuple[int, int, int, int]:
+        left, top, right, bottom = bounds
+        size = self.cell_size
+        return left // size, top // size, max(left, right - 1) // size, max(top, bottom - 1) // size
+
+    @staticmethod
+    def _cells_in(cell_range) -> Iterable[Tuple[int, int]]:
+        x0, y0, x1, y1 = cell_range
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield cx, cy
+
+    def insert(self, item, rect):
+        """Add the item or move it to its new rect"""
+        bounds = self._bounds(rect)
+        cell_range = self._cell_range(bounds)
+        previous = self._items.get(item)
+        if previous is not None and previous[0] == cell_range:
+            self._items[item] = (cell_range, bounds)
+            return
+        if previous is not None:
+            self._unlink(item, previous[0])
+        for cell in self._cells_in(cell_range):
+            self._cells[cell].add(item)
+        self._items[item] = (cell_range, bounds)
+
+    move = insert
+
+    def remove(self, item):
+        previous = self._items.pop(item, None)
+        if previous is not None:
+            self._unlink(item, previous[0])
+
+    def _unlink(self, item, cell_range):
+        for cell in self._cells_in(cell_range):
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.discard(item)
+                if not bucket:
+                    del self._cells[cell]
+
+    def query_point(self, x: float, y: float) -> Set:
+        """Items whose rect contains the point"""
+        cell = (int(x) // self.cell_size, int(y) // self.cell_size)
+        return {item for item in self._cells.get(cell, ())
+                if self._contains(self._items[item][1], x, y)}
+
+    def query_rect(self, rect) -> Set:
+        """Items whose rect overlaps `rect`"""
+        bounds = self._bounds(rect)
+        found = set()
+        for cell in self._cells_in(self._cell_range(bounds)):
+            found.update(self._cells.get(cell, ()))
+        return {item for item in found if self._overlaps(self._items[item][1], bounds)}
+
+    def bounds_of(self, item) -> Tuple[int, int, int, int]:
+        return self._items[item][1]
+
+    @staticmethod
+    def _contains(bounds, x, y) -> bool:
+        left, top, right, bottom = bounds
+        return left <= x < right and top <= y < bottom
+
+    @staticmethod
+    def _overlaps(a, b) -> bool:
+        return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+    def clear(self):
+        self._cells.clear()
+        self._items.clear()
@@ -0,0 +1,112 @@
+import numpy as np
+from typing import Optional
+
+ANIMATION_TYPES = (None, "hover")
+ANIMATION_CODES = {name: code for code, name in enumerate(ANIMATION_TYPES)}
+
+FLOAT_FIELDS = ("x", "y", "target_x", "target_y", "prev_x", "prev_y",
+                "angle", "target_angle", "prev_angle", "move_speed", "rotation_speed",
+                "hover_phase", "hover_offset_y", "flip_progress")
+BOOL_FIELDS = ("active", "smooth_movement", "smooth_rotation", "is_animating", "is_flipping", "face_down", "transform_dirty")
+INT_FIELDS = ("animation_type",)
+
+class CardStore:
+    """Transform and animation state of many cards in contiguous arrays (struct of arrays).
+    Cards are views on one slot, step() eases every card in one vectorized pass.
+    Hover, flip and deal animations are tweens run by the AnimationScheduler on the same arrays."""
+    def __init__(self, capacity: int = 128):
+        self.capacity = 0
+        self.count = 0
+        self._free = []
+        self.arrays = {}
+        for name in FLOAT_FIELDS:
+            self.arrays[name] = np.zeros(0, dtype=np.float64)
+        for name in BOOL_FIELDS:
+            self.arrays[name] = np.zeros(0, dtype=bool)
+        for name in INT_FIELDS:
+            self.arrays[name] = np.zeros(0, dtype=np.int8)
+        self._grow(capacity)
+
+    def __len__(self):
+        return self.count - len(self._free)
+
+    def _grow(self, capacity: int):
+        for name, array in self.arrays.items():
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self.capacity] = array
+            self.arrays[name] = grown
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def allocate(self, x: float = 0.0, y: float = 0.0, angle: float = 0.0,
+                 move_speed: float = 10.0, rotation_speed: float = 5.0) -> int:
+        """Reserve a slot for a card and return its index"""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self.count == self.capacity:
+                self._grow(max(16, self.capacity * 2))
+            slot = self.count
+            self.count += 1
+        for name in self.arrays:
+            self.arrays[name][slot] = 0
+        self.x[slot] = self.target_x[slot] = self.prev_x[slot] = x
+        self.y[slot] = self.target_y[slot] = self.prev_y[slot] = y
+        self.angle[slot] = self.target_angle[slot] = self.prev_angle[slot] = angle
+        self.move_speed[slot] = move_speed
+        self.rotation_speed[slot] = rotation_speed
+        self.smooth_movement[slot] = True
+        self.smooth_rotation[slot] = True
+        self.active[slot] = True
+        return slot
+
+    def release(self, slot: int):
+        if self.active[slot]:
+            self.active[slot] = False
+            self._free.append(slot)
+
+    def active_slots(self) -> np.ndarray:
+        return np.flatnonzero(self.active[:self.count])
+
+    def step(self, dt: float, slots: Optional[np.ndarray] = None) -> np.ndarray:
+        """Advance every active card (or only `slots`) by dt seconds, returns the slots that moved"""
+        if slots is None:
+            slots = self.active_slots()
+        if slots.size == 0:
+            return slots
+        x, y, angle = self.x[slots], self.y[slots], self.angle[slots]
+        self.prev_x[slots], self.prev_y[slots], self.prev_angle[slots] = x, y, angle
+        # Smooth movement with easing, only if the distance is significant
+        dx = self.target_x[slots] - x
+        dy = self.target_y[slots] - y
+        moving = self.smooth_movement[slots] & (dx * dx + dy * dy > 0.25)
+        move_factor = np.where(moving, np.minimum(1.0, self.move_speed[slots] * dt), 0.0)
+        self.x[slots] = x + dx * move_factor
+        self.y[slots] = y + dy * move_factor
+        # Smooth rotation with easing
+        angle_diff = self.target_angle[slots] - angle
+        rotating = self.smooth_rotation[slots] & (np.abs(angle_diff) > 0.1)
+        self.angle[slots] = angle + np.where(rotating, angle_diff * self.rotation_speed[slots] * dt, 0.0)
+        moved = moving | rotating
+        self.transform_dirty[slots] |= moved
+        return slots[moved]
+
+class StoreField:
+    """Attribute of a card view that lives in its CardStore slot.
+    Fields with `transform` set flag the slot's transform_dirty when written, so renderers resync the card."""
+    def __init__(self, name: str, kind=float, transform: bool = False):
+        self.name = name
+        self.kind = kind
+        self.transform = transform
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        return self.kind(view.store.arrays[self.name][view.slot])
+
+    def __set__(self, view, value):
+        view.store.arrays[self.name][view.slot] = value
+        if self.transform:
+            view.store.transform_dirty[view.slot] = True
+
+card_store = CardStore()
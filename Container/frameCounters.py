@@ -0,0 +1,31 @@
+from collections import Counter
+
+class FrameCounters:
+    """Counts render work (face rebuilds, rotations, ...) done per frame"""
+    def __init__(self):
+        self.current = Counter()
+        self.last_frame = Counter()
+        self.totals = Counter()
+        self.frame_count = 0
+
+    def increment(self, name: str, amount: int = 1):
+        self.current[name] += amount
+
+    def begin_frame(self):
+        """Close the running frame and start counting a new one"""
+        self.totals.update(self.current)
+        self.last_frame = self.current
+        self.current = Counter()
+        self.frame_count += 1
+
+    def get(self, name: str) -> int:
+        """Count recorded for `name` during the last completed frame"""
+        return self.last_frame[name]
+
+    def reset(self):
+        self.current.clear()
+        self.last_frame = Counter()
+        self.totals.clear()
+        self.frame_count = 0
+
+frame_counters = FrameCounters()
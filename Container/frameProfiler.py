@@ -0,0 +1,157 @@
+from Container.imports_library import *
+import csv
+import json
+import numpy as np
+from Container.frameCounters import FrameCounters, frame_counters
+
+PHASES = ("idle", "events", "menu", "update", "draw", "flip")
+COUNTERS = ("face_rebuilds", "rotate_calls", "font_renders", "blits", "glyph_blits", "tint_renders", "flip_renders")
+# four lines of text above the graph
+TEXT_HEIGHT = 54
+PHASE_COLORS = ((70, 70, 70), (230, 180, 40), (160, 90, 220), (60, 170, 230), (80, 210, 110), (230, 80, 80))
+
+class FrameProfiler:
+    """Per-phase frame timings and frame counters in a ring buffer of the last `capacity` frames.
+    While disabled every hook returns right away, so it can stay in the game loop."""
+    def __init__(self, capacity: int = 600, counters: FrameCounters = frame_counters):
+        self.enabled = False
+        self.capacity = capacity
+        self.counters = counters
+        self.phase_ms = np.zeros((capacity, len(PHASES)))
+        self.counter_values = np.zeros((capacity, len(COUNTERS)), dtype=np.int64)
+        self.frame_ms = np.zeros(capacity)
+        self.frames = 0
+        self._phase_index = {phase: index for index, phase in enumerate(PHASES)}
+        self._frame_start = 0.0
+        self._last_mark = 0.0
+        self._row = np.zeros(len(PHASES))
+
+    def toggle(self) -> bool:
+        self.enabled = not self.enabled
+        # A frame that was running while the profiler was off is not recorded
+        self._frame_start = 0.0
+        return self.enabled
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._frame_start = self._last_mark = time.perf_counter()
+        self._row[:] = 0.0
+
+    def mark(self, phase: str):
+        """Close `phase`, the time since the previous mark is added to it"""
+        if not self.enabled or not self._frame_start:
+            return
+        now = time.perf_counter()
+        self._row[self._phase_index[phase]] += (now - self._last_mark) * 1000
+        self._last_mark = now
+
+    def end_frame(self):
+        if not self.enabled or not self._frame_start:
+            return
+        slot = self.frames % self.capacity
+        self.phase_ms[slot] = self._row
+        self.frame_ms[slot] = (time.perf_counter() - self._frame_start) * 1000
+        current = self.counters.current
+        self.counter_values[slot] = [current[name] for name in COUNTERS]
+        self.frames += 1
+
+    def _ordered(self, values: np.ndarray) -> np.ndarray:
+        """Recorded rows, oldest first"""
+        if self.frames <= self.capacity:
+            return values[:self.frames]
+        start = self.frames % self.capacity
+        return np.concatenate((values[start:], values[:start]))
+
+    def recent_frames(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self._ordered(self.frame_ms), self._ordered(self.phase_ms), self._ordered(self.counter_values)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Mean, 95th percentile and worst time per phase over the buffered frames"""
+        frame_ms, phase_ms, _ = self.recent_frames()
+        if not len(frame_ms):
+            return {}
+        columns = {"frame": frame_ms}
+        columns.update({phase: phase_ms[:, index] for index, phase in enumerate(PHASES)})
+        return {name: {"mean_ms": float(values.mean()), "p95_ms": float(np.percentile(values, 95)), "max_ms": float(values.max())}
+                for name, values in columns.items()}
+
+    def dump(self, path) -> Optional[Path]:
+        """Write the buffered frames as CSV, or as JSON when the path ends in .json"""
+        if not self.frames:
+            return None
+        path = Path(path)
+        frame_ms, phase_ms, counter_values = self.recent_frames()
+        first_frame = self.frames - len(frame_ms)
+        if path.suffix == ".json":
+            rows = [{"frame": first_frame + i, "frame_ms": float(frame_ms[i]),
+                     "phases_ms": dict(zip(PHASES, map(float, phase_ms[i]))),
+                     "counters": dict(zip(COUNTERS, map(int, counter_values[i])))} for i in range(len(frame_ms))]
+            with open(path, "w") as file:
+                json.dump({"summary": self.summary(), "frames": rows}, file, indent=1)
+        else:
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(("frame", "frame_ms") + tuple(f"{phase}_ms" for phase in PHASES) + COUNTERS)
+                for i in range(len(frame_ms)):
+                    writer.writerow([first_frame + i, f"{frame_ms[i]:.4f}"] + [f"{value:.4f}" for value in phase_ms[i]]
+                                    + counter_values[i].tolist())
+        return path
+
+class ProfilerOverlay:
+    """Stacked frame-time graph of the last frames plus the per-frame counters, toggled with F3.
+    The graph scrolls by one column per frame, so only the newest frame is drawn."""
+    def __init__(self, profiler: FrameProfiler, size: Tuple[int, int] = (440, 164), scale_ms: float = 50.0):
+        self.profiler = profiler
+        self.size = size
+        self.scale_ms = scale_ms
+        self.graph = pygame.Surface((size[0], size[1] - TEXT_HEIGHT))
+        self.graph.fill((0, 0, 0))
+        self.font = pygame.font.SysFont('arial', 12)
+        self._text = None
+        self._drawn_frames = 0
+
+    def _add_column(self, phase_ms: np.ndarray):
+        graph = self.graph
+        width, height = graph.get_size()
+        graph.scroll(-1, 0)
+        pygame.draw.line(graph, (0, 0, 0), (width - 1, 0), (width - 1, height))
+        bottom = height
+        for value, color in zip(phase_ms, PHASE_COLORS):
+            top = bottom - value / self.scale_ms * height
+            if bottom - top >= 0.5:
+                pygame.draw.line(graph, color, (width - 1, int(top)), (width - 1, bottom))
+            bottom = top
+        # 60 and 30 fps lines
+        for budget in (1000 / 60, 1000 / 30):
+            graph.set_at((width - 1, int(height - budget / self.scale_ms * height)), (255, 255, 255))
+
+    def draw(self, screen: pygame.Surface) -> pygame.Rect:
+        profiler = self.profiler
+        if profiler.frames and profiler.frames != self._drawn_frames:
+            self._add_column(profiler.phase_ms[(profiler.frames - 1) % profiler.capacity])
+            # The text changes every frame but only needs to be readable, refresh it a few times a second
+            if self._text is None or profiler.frames % 15 == 0:
+                self._text = self._render_text()
+            self._drawn_frames = profiler.frames
+        rect = pygame.Rect(screen.get_width() - self.size[0] - 10, 10, *self.size)
+        screen.fill((20, 20, 20), rect)
+        screen.blit(self.graph, (rect.left, rect.top + TEXT_HEIGHT))
+        if self._text is not None:
+            for i, line in enumerate(self._text):
+                screen.blit(line, (rect.left + 4, rect.top + 2 + i * 13))
+        self.profiler.counters.increment("blits", 1 + len(self._text or ()))
+        return rect
+
+    def _render_text(self) -> List[pygame.Surface]:
+        profiler = self.profiler
+        frame_ms, phase_ms, counter_values = profiler.recent_frames()
+        recent = slice(-60, None)
+        mean_ms = float(frame_ms[recent].mean()) if len(frame_ms) else 0.0
+        worst_ms = float(frame_ms[recent].max()) if len(frame_ms) else 0.0
+        phases = "  ".join(f"{phase} {value:.1f}" for phase, value in zip(PHASES, phase_ms[recent].mean(axis=0)))
+        counters = [f"{name} {value}" for name, value in zip(COUNTERS, counter_values[-1])]
+        half = (len(counters) + 1) // 2
+        lines = [f"frame {mean_ms:.2f} ms avg, {worst_ms:.2f} ms worst ({1000 / mean_ms if mean_ms else 0:.0f} fps)", phases,
+                 "  ".join(counters[:half]), "  ".join(counters[half:])]
+        return [self.font.render(line, True, (230, 230, 230)) for line in lines]
@@ -0,0 +1,47 @@
+from Container.imports_library import *
+
+class LoopScheduler:
+    """Fixed simulation timestep driven by an accumulator, rendering runs once per frame under a live frame cap"""
+    def __init__(self, simulation_rate: int = 120, frame_cap: int = 60, max_steps: int = 8, max_frame_time: float = 0.25):
+        self.step_dt = 1.0 / simulation_rate
+        self.frame_cap = frame_cap
+        self.max_steps = max_steps
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.frame_dt = 0.0
+        self.clock = pygame.time.Clock()
+
+    def set_frame_cap(self, frame_cap: int):
+        """Frames per second, 0 runs uncapped (benchmark mode)"""
+        self.frame_cap = max(0, int(frame_cap))
+
+    def tick(self) -> float:
+        """Wait for the frame cap and add the elapsed real time to the accumulator, returns it in seconds"""
+        elapsed = self.clock.tick(self.frame_cap) / 1000.0
+        # Clamp long stalls (window drag, breakpoints) so the simulation does not spiral
+        self.frame_dt = min(elapsed, self.max_frame_time)
+        self.accumulator += self.frame_dt
+        return self.frame_dt
+
+    def steps(self):
+        """Yield the fixed timestep once for every step the simulation owes"""
+        steps = 0
+        while self.accumulator >= self.step_dt and steps < self.max_steps:
+            self.accumulator -= self.step_dt
+            steps += 1
+            yield self.step_dt
+        if steps == self.max_steps:
+            # Too far behind, drop the backlog instead of slowing every following frame
+            self.accumulator %= self.step_dt
+
+    def reset_accumulator(self):
+        """Forget pending simulation time, e.g. while a menu pauses the board"""
+        self.accumulator = 0.0
+
+    @property
+    def alpha(self) -> float:
+        """How far rendering is between the previous and the current simulation state"""
+        return self.accumulator / self.step_dt
+
+    def get_fps(self) -> float:
+        return self.clock.get_fps()
@@ -3,14 +3,8 @@ import random
 import sys
 import time
 import os
-import pygame_menu
-from pygame_menu import themes
 from enum import Enum
 from dataclasses import dataclass
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, Callable, List
 import math
-import requests
-import io
-from pathlib import Path
-current_time = time.time()
-random.seed(current_time)
\ No newline at end of file
+from pathlib import Path
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+import random
+import secrets
+import zlib
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SEED_ENV = "CARDGAME_SEED"
+_STREAM, _CHILD = 0, 1
+
+class RngService:
+    """Match seed that derives independent, reproducible random streams (deck, rarity, card types, stats, ai, ...).
+    The same seed always gives the same streams, spawn() gives non-overlapping services for parallel workers.
+    numpy is only imported once a stream is created, the headless engine does not pay for it at import."""
+    def __init__(self, seed: Optional[int] = None, spawn_key: Tuple[int, ...] = ()):
+        self.seed = seed if seed is not None else secrets.randbits(63)
+        self.spawn_key = spawn_key
+        self._streams: Dict[str, random.Random] = {}
+        self._generators: Dict[str, "np.random.Generator"] = {}
+
+    def __repr__(self):
+        return f"RngService(seed={self.seed}, spawn_key={self.spawn_key})"
+
+    def _sequence(self, *key: int) -> "np.random.SeedSequence":
+        import numpy as np
+        return np.random.SeedSequence(self.seed, spawn_key=self.spawn_key + key)
+
+    @staticmethod
+    def _stream_key(name: str) -> int:
+        # crc32 is stable across runs and processes, unlike hash()
+        return zlib.crc32(name.encode("utf-8"))
+
+    def stream(self, name: str) -> random.Random:
+        """random.Random substream, created once per name"""
+        stream = self._streams.get(name)
+        if stream is None:
+            state = self._sequence(_STREAM, self._stream_key(name)).generate_state(2, "uint64")
+            stream = random.Random(int(state[0]) << 64 | int(state[1]))
+            self._streams[name] = stream
+        return stream
+
+    def generator(self, name: str) -> "np.random.Generator":
+        """numpy Generator substream for vectorized code, created once per name"""
+        generator = self._generators.get(name)
+        if generator is None:
+            import numpy as np
+            generator = np.random.default_rng(self._sequence(_STREAM, self._stream_key(name)))
+            self._generators[name] = generator
+        return generator
+
+    def spawn(self, index: int) -> "RngService":
+        """Independent service for worker or match `index`, reproducible from this seed"""
+        return RngService(self.seed, self.spawn_key + (_CHILD, index))
+
+    @property
+    def deck(self) -> random.Random:
+        return self.stream("deck")
+
+    @property
+    def rarity(self) -> random.Random:
+        return self.stream("rarity")
+
+    @property
+    def card_types(self) -> random.Random:
+        return self.stream("card_type")
+
+    @property
+    def stats(self) -> random.Random:
+        return self.stream("stats")
+
+    @property
+    def ai(self) -> random.Random:
+        return self.stream("ai")
+
+def seed_from_environment() -> Optional[int]:
+    value = os.environ.get(SEED_ENV)
+    return int(value) if value else None
+
+_default_service: Optional[RngService] = None
+
+def get_rng_service() -> RngService:
+    """Service used when nothing is injected, seeded from CARDGAME_SEED if set"""
+    global _default_service
+    if _default_service is None:
+        _default_service = RngService(seed_from_environment())
+    return _default_service
+
+def set_rng_service(service: RngService) -> RngService:
+    global _default_service
+    _default_service = service
+    return service
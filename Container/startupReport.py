@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+# Modules that should only load when their feature is used
+HEAVY_MODULES = ("pygame", "pygame_menu", "requests", "numpy")
+FIRST_FRAME_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+app = main.Application()
+created = time.perf_counter()
+app.frame()
+framed = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "init_ms": (created - imported) * 1000,
+                  "first_frame_ms": (framed - created) * 1000, "total_ms": (framed - start) * 1000}))
+"""
+
+def run_python(args: List[str]) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    env.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    return subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True, text=True)
+
+def import_times(module: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, depth) for every import done by `import module`, as -X importtime reports it"""
+    result = run_python(["-X", "importtime", "-c", f"import {module}"])
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+def report(module: str, top: int = 15) -> dict:
+    entries = import_times(module)
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in entries:
+        by_package[name.split(".")[0]] += self_us
+    loaded = {name for name, _, _, _ in entries}
+    return {
+        "module": module,
+        "total_ms": sum(self_us for _, self_us, _, _ in entries) / 1000,
+        "packages_ms": {name: us / 1000 for name, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]},
+        "slowest_ms": {name: us / 1000 for name, us, _, _ in sorted(entries, key=lambda entry: -entry[1])[:top]},
+        "heavy_modules": {name: name in loaded for name in HEAVY_MODULES},
+    }
+
+def first_frame() -> dict:
+    """Time from interpreter start of `import main` to the first presented frame"""
+    result = run_python(["-c", FIRST_FRAME_SCRIPT])
+    if result.returncode != 0:
+        raise RuntimeError(f"first frame run failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def print_report(data: dict):
+    print(f"import {data['module']}: {data['total_ms']:.1f} ms")
+    print("  by package:")
+    for name, ms in data["packages_ms"].items():
+        print(f"    {name:<44} {ms:8.1f} ms")
+    print("  slowest modules (self time):")
+    for name, ms in data["slowest_ms"].items():
+        print(f"    {name:<44} {ms:8.1f} ms")
+    print("  heavy modules loaded: " + ", ".join(f"{name}={'yes' if loaded else 'no'}" for name, loaded in data["heavy_modules"].items()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startup report: import cost per package (like -X importtime) and time to first frame")
+    parser.add_argument("modules", nargs="*", default=["main"], help="modules to import, e.g. main CardDeck.cardEngine")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--first-frame", action="store_true", help="also time Application start-up to the first frame")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+    results = [report(module, args.top) for module in args.modules]
+    if args.first_frame:
+        frame = first_frame()
+    if args.json:
+        output = {"imports": results}
+        if args.first_frame:
+            output["first_frame"] = frame
+        print(json.dumps(output, indent=2))
+    else:
+        for data in results:
+            print_report(data)
+        if args.first_frame:
+            print("first frame: " + ", ".join(f"{name} {ms:.1f}" for name, ms in frame.items()))
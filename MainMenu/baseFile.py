@@ -1,25 +1,35 @@
 from Container.imports_library import *
 
+def default_settings() -> Dict[str, int]:
+    return {
+        'music_volume': 50,
+        'sound_effects': 50,
+        'frame_rate': 60,
+        'brightness': 100
+    }
+
 class BaseMenu:
-    def __init__(self, screen: pygame.Surface, width: int, height: int):
+    def __init__(self, screen: pygame.Surface, width: int, height: int, settings: Optional[Dict[str, int]] = None):
         self.screen = screen
         self.width = width
         self.height = height
-        self.settings = {
-            'music_volume': 50,
-            'sound_effects': 50,
-            'frame_rate': 60,
-            'brightness': 100
-        }
+        # Menus given the same dict share their settings, the game loop reads them live
+        self.settings = settings if settings is not None else default_settings()
     
     def create_settings_menu(self):
+        # pygame_menu is only imported once a menu is built
+        import pygame_menu
         settings_menu = pygame_menu.Menu('Settings', self.width, self.height, theme=pygame_menu.themes.THEME_DARK)
+        # Lay the menu out once after all widgets are added instead of after each one
+        settings_menu.disable_render()
         # Add sliders and store references
         settings_menu.add.range_slider('Music Volume', default=self.settings['music_volume'], range_values=(0, 100), increment=1, onchange=lambda value: self.update_setting('music_volume', value))
         settings_menu.add.range_slider('Sound Effects', default=self.settings['sound_effects'], range_values=(0, 100), increment=1,onchange=lambda value: self.update_setting('sound_effects', value))
         settings_menu.add.range_slider('Frame Rate', default=self.settings['frame_rate'], range_values=(30, 120), increment=1,onchange=lambda value: self.update_setting('frame_rate', value))
         settings_menu.add.range_slider('Brightness', default=self.settings['brightness'], range_values=(0, 100), increment=1,onchange=lambda value: self.update_setting('brightness', value))
         settings_menu.add.button('Return', pygame_menu.events.BACK)
+        settings_menu.enable_render()
+        settings_menu.render()
         return settings_menu
     
     def update_setting(self, key: str, value: int):
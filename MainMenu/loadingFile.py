@@ -0,0 +1,21 @@
+from Container.imports_library import *
+from MainMenu.baseFile import *
+
+class LoadingScreen(BaseMenu):
+    def __init__(self, screen: pygame.Surface, width: int, height: int, settings: Optional[Dict[str, int]] = None):
+        super().__init__(screen, width, height, settings)
+        self.create_menus()
+    
+    def create_menus(self):
+        import pygame_menu
+        # Loading screen, shown while assets, menus and cards load in the background
+        self.loading_menu = pygame_menu.Menu('Loading', self.width, self.height, theme=pygame_menu.themes.THEME_DARK)
+        self.status_label = self.loading_menu.add.label('Loading assets...')
+        self.progress_bar = self.loading_menu.add.progress_bar('', default=0)
+    
+    def set_progress(self, done: int, total: int):
+        self.progress_bar.set_value(100 * done / max(1, total))
+        self.status_label.set_title(f'Loading assets... {done}/{total}')
+    
+    def get_loading_menu(self):
+        return self.loading_menu
@@ -1,31 +1,41 @@
 from Container.imports_library import *
 from MainMenu.baseFile import *
+from CardDeck.cardSave import SaveSlot, SaveData, SaveFormatError, SLOT_COUNT
 
 class MainMenu(BaseMenu):
-    def __init__(self, screen: pygame.Surface, width: int, height: int):
-        super().__init__(screen, width, height)
+    def __init__(self, screen: pygame.Surface, width: int, height: int, settings: Optional[Dict[str, int]] = None):
+        super().__init__(screen, width, height, settings)
         self.play = False
         self.selected_save_slot = None
+        self.loaded_save: Optional[SaveData] = None
         self.create_menus()
     
     def create_menus(self):
+        import pygame_menu
         # Main menu
         self.main_menu = pygame_menu.Menu('Welcome', self.width, self.height, theme=pygame_menu.themes.THEME_DARK)
         self.load_menu = pygame_menu.Menu('Load Game', self.width, self.height, theme=pygame_menu.themes.THEME_DARK)
         # Add main menu buttons
+        self.main_menu.disable_render()
         self.main_menu.add.button('Play Game', self.start_game)
         self.main_menu.add.button('Load Game', self.show_load_menu)
         self.main_menu.add.button('Settings', self.show_settings)
         self.main_menu.add.button('Quit', pygame_menu.events.EXIT)
+        self.main_menu.enable_render()
+        self.main_menu.render()
         # Create sub-menus
         self.load_menu = self.create_load_menu()
         self.settings_menu = self.create_settings_menu()
     
     def create_load_menu(self):
+        import pygame_menu
         self.load_menu.clear()
-        for i in range(1, 11):
+        self.load_menu.disable_render()
+        for i in range(1, SLOT_COUNT + 1):
             self.load_menu.add.button(f'Save Slot {i}', lambda slot=i: self.load_game(slot))
         self.load_menu.add.button('Return to Main Menu', pygame_menu.events.BACK)
+        self.load_menu.enable_render()
+        self.load_menu.render()
         return self.load_menu
     
     def start_game(self):
@@ -34,7 +44,15 @@ class MainMenu(BaseMenu):
     def load_game(self, slot_number: int):
         self.selected_save_slot = slot_number
         self.play = True
-        print(f"Loading game from slot {slot_number}")
+        if self.loaded_save is not None:
+            self.loaded_save.close()
+        # Only the header is read here, cards are decoded when the board asks for them
+        try:
+            self.loaded_save = SaveSlot(slot_number).load()
+            print(f"Loading game from slot {slot_number}")
+        except (OSError, SaveFormatError) as error:
+            self.loaded_save = None
+            print(f"Save slot {slot_number} could not be loaded ({error}), starting a new game")
     
     def show_load_menu(self):
         self.main_menu._open(self.load_menu)
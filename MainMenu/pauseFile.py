@@ -2,20 +2,26 @@ from Container.imports_library import *
 from MainMenu.baseFile import *
 
 class PauseMenu(BaseMenu):
-    def __init__(self, screen: pygame.Surface, width: int, height: int):
-        super().__init__(screen, width, height)
+    def __init__(self, screen: pygame.Surface, width: int, height: int, settings: Optional[Dict[str, int]] = None):
+        super().__init__(screen, width, height, settings)
         self.resume_game = False
         self.exit_to_main = False
+        # Set by the game, writes the current board to the selected save slot
+        self.on_save: Optional[Callable[[], None]] = None
         self.create_menus()
     
     def create_menus(self):
+        import pygame_menu
         # Pause menu
         self.pause_menu = pygame_menu.Menu('Game Paused', self.width, self.height, theme=pygame_menu.themes.THEME_DARK)
         # Add pause menu buttons
+        self.pause_menu.disable_render()
         self.pause_menu.add.button('Play Game', self.resume)
         self.pause_menu.add.button('Settings', self.show_settings)
         self.pause_menu.add.button('Save Game', self.save_game)
         self.pause_menu.add.button('Main Menu', self.return_to_main)
+        self.pause_menu.enable_render()
+        self.pause_menu.render()
         # Create settings menu
         self.settings_menu = self.create_settings_menu()
     
@@ -23,6 +29,8 @@ class PauseMenu(BaseMenu):
         self.resume_game = True
     
     def save_game(self):
+        if self.on_save is not None:
+            self.on_save()
         print("Game saved!")
     
     def return_to_main(self):
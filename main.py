@@ -1,79 +1,336 @@
 from Container.imports_library import *
 from MainMenu.menuFile import *
 from MainMenu.pauseFile import *
+from MainMenu.loadingFile import *
 from CardDeck.cardFile import *
+from Container.frameCounters import frame_counters
+from CardDeck.cardInput import InputDispatcher
+from CardDeck.cardRenderer import DirtyCardRenderer
+from Container.gameLoop import LoopScheduler
+from CardDeck.cardStore import card_store
+from CardDeck.cardAnimation import animations
+from Container.rngService import RngService, set_rng_service, seed_from_environment
+from CardDeck.cardSave import SaveSlot, SaveData, pack_card
+from CardDeck.cardLoader import AssetLoader
+from CardDeck.cardLayout import LayoutSolver
+from Container.frameProfiler import FrameProfiler, ProfilerOverlay
 
-def on_resize(screen, main_menu, pause_menu) -> None:
+CARD_SCALE = (100, 125)
+# Card sizes and positions are laid out for this window size and scaled with the window,
+# in steps so resizes land on a few sizes whose faces stay cached
+DESIGN_SIZE = (1280, 720)
+UI_SCALE_STEP = 0.05
+CARD_FACE = "Assets\cardFront.png"
+AUTOSAVE_INTERVAL = 30.0
+STARTING_CARDS = (((100, 100), 'Standard'), ((300, 100), 'Bonus'))
+
+def layout_scale(size: Tuple[int, int]) -> float:
+    scale = min(size[0] / DESIGN_SIZE[0], size[1] / DESIGN_SIZE[1])
+    return max(UI_SCALE_STEP, round(scale / UI_SCALE_STEP) * UI_SCALE_STEP)
+
+def on_resize(screen, main_menu, pause_menu, loading_screen=None) -> None:
     window_size = screen.get_size()
     new_w, new_h = window_size[0], window_size[1]
-    main_menu.main_menu.resize(new_w, new_h)
-    main_menu.load_menu.resize(new_w, new_h)
-    pause_menu.pause_menu.resize(new_w, new_h)
+    # menus that are still loading get the new size when they are built
+    if main_menu is not None:
+        main_menu.main_menu.resize(new_w, new_h)
+        main_menu.load_menu.resize(new_w, new_h)
+    if pause_menu is not None:
+        pause_menu.pause_menu.resize(new_w, new_h)
+    if loading_screen is not None:
+        loading_screen.loading_menu.resize(new_w, new_h)
     
 class Application:
-    def __init__(self):
+    def __init__(self, dirty_rendering: bool = False, uncapped: bool = False, seed: Optional[int] = None,
+                 profile: bool = False, profile_trace: str = "frame_profile.csv"):
+        # every random choice of the match comes from streams of one seed, logged so a run can be replayed
+        self.rng = set_rng_service(RngService(seed if seed is not None else seed_from_environment()))
+        print(f"Match seed: {self.rng.seed}")
         pygame.init()
         pygame.display.set_caption("CardGame")
         self.screenWidth, self.screenHeight = 1280, 720
-        self.clock = pygame.time.Clock()
+        # settings shared by the main and pause menus, the Frame Rate slider drives the frame cap
+        self.settings = default_settings()
+        self.uncapped = uncapped
+        self.loop = LoopScheduler(frame_cap=0 if uncapped else self.settings['frame_rate'])
+        # frame profiler, off unless started with --profile or toggled with F3, its trace is written on exit
+        self.profiler = FrameProfiler()
+        self.profiler_overlay: Optional[ProfilerOverlay] = None
+        self.profile_trace = profile_trace
         self.running = True
         self.screen = pygame.display.set_mode((self.screenWidth, self.screenHeight), pygame.RESIZABLE)
-        self.background_surface = pygame.Surface((self.screenWidth, self.screenHeight)).convert()
-        self.background_surface.fill(pygame.Color("black"))
-        # menu
-        self.main_menu = MainMenu(screen=self.screen, width=self.screenWidth, height=self.screenHeight)
-        self.main_menu.get_main_menu()
-        self.pause_menu = PauseMenu(screen=self.screen, width=self.screenWidth, height=self.screenHeight)
-        self.pause_menu.get_pause_menu()
+        self.background_surface = self.build_background()
+        self.ui_scale = layout_scale((self.screenWidth, self.screenHeight))
+        self.loading = True
+        self.pending_resize = False
+        # menus and cards are built by the loader while the loading screen shows its progress
+        self.main_menu: Optional[MainMenu] = None
+        self.pause_menu: Optional[PauseMenu] = None
+        self.loading_screen = LoadingScreen(screen=self.screen, width=self.screenWidth, height=self.screenHeight, settings=self.settings)
         # cards
         self.all_sprites = []
-        self.card1 = Cards(position=(100, 100), scale=(100, 125), card_type='Standard', face_image="Assets\cardFront.png")
-        self.card2 = Cards(position=(300, 100), scale=(100, 125), card_type='Bonus', face_image="Assets\cardFront.png")
-        self.all_sprites.append(self.card1)
-        self.all_sprites.append(self.card2)
+        self.input_dispatcher = InputDispatcher()
+        # dropped or dealt cards are pushed apart, the dropped card stays where it was put
+        self.layout = LayoutSolver(bounds=(0, 0, self.screenWidth, self.screenHeight))
+        self.input_dispatcher.on_drop = lambda card: self.layout.settle([card], pinned=[card])
+        # players turn their own cards over with a right click
+        self.input_dispatcher.on_right_click = lambda card: card.flip()
+        # optional dirty-rect rendering of the board, only changed areas are redrawn and pushed to the display
+        self.card_renderer = DirtyCardRenderer(self.background_surface) if dirty_rendering else None
+        self.board_visible = False
+        # saves: a full snapshot from the pause menu, autosaves only journal the cards that changed since
+        self.save_slot: Optional[SaveSlot] = None
+        self.saved_records: List[tuple] = []
+        self.last_autosave = time.perf_counter()
+        self.loader = AssetLoader()
+        self.start_loading()
+        if profile:
+            self.toggle_profiler()
+    
+    def start_loading(self):
+        """Images and font files load on worker threads, then menus and cards are built a few per frame"""
+        self.loader.load_image(CARD_FACE)
+        self.loader.load_image(CARD_BACK_PATH)
+        self.loader.submit(prepare_fonts, Standard_Cards.load_icon_renderer, description="fonts")
+        self.loader.call_soon(self.preload_card_images)
+        self.loader.call_soon(self.build_main_menu)
+        self.loader.call_soon(self.build_pause_menu)
+        for position, card_type in STARTING_CARDS:
+            self.loader.call_soon(self.new_card, position, card_type)
+        self.loader.call_soon(self.deal_hand)
+    
+    def preload_card_images(self):
+        """Scale the card images once the files are decoded and pack them into an atlas, every card draws from its sub-surfaces.
+        The images and atlas of the previous card size are dropped."""
+        entries = Cards.image_entries(CARD_FACE, self.card_size())
+        image_assets.preload(entries, atlas=True)
+        image_assets.prune(entries)
+    
+    def build_main_menu(self):
+        self.main_menu = MainMenu(screen=self.screen, width=self.screenWidth, height=self.screenHeight, settings=self.settings)
+        self.main_menu.get_main_menu()
+    
+    def build_pause_menu(self):
+        self.pause_menu = PauseMenu(screen=self.screen, width=self.screenWidth, height=self.screenHeight, settings=self.settings)
+        self.pause_menu.get_pause_menu()
+        self.pause_menu.on_save = self.save_game
+    
+    def deal(self):
+        self.layout.settle(self.all_sprites)
+    
+    def deal_hand(self):
+        """Lay the board out, then deal the cards to their places from below the screen one after the other"""
+        self.deal()
+        # a crowded board may need another go from where the last one stopped
+        for _ in range(3):
+            if self.layout.solve():
+                break
+            self.deal()
+        placements = [(card.target_x, card.target_y, card.target_angle) for card in self.all_sprites]
+        origin = (self.screenWidth / 2, self.screenHeight + self.card_size()[1])
+        animations.deal(self.all_sprites, placements, origin=origin)
+    
+    def add_card(self, card: Cards) -> Cards:
+        self.all_sprites.append(card)
+        self.input_dispatcher.add(card)
+        self.layout.add(card)
+        if self.card_renderer is not None:
+            self.card_renderer.add(card)
+        return card
+    
+    def card_size(self) -> Tuple[int, int]:
+        return round(CARD_SCALE[0] * self.ui_scale), round(CARD_SCALE[1] * self.ui_scale)
+    
+    def new_card(self, position: Tuple[int, int], card_type: str) -> Cards:
+        position = (position[0] * self.ui_scale, position[1] * self.ui_scale)
+        return self.add_card(Cards(position=position, scale=self.card_size(), card_type=card_type, face_image=CARD_FACE, rng=self.rng))
+    
+    def board_records(self) -> List[tuple]:
+        # positions are saved in layout units so a save loads the same in any window size,
+        # cards still being dealt or pushed are saved where they are going
+        return [pack_card(card.model, card.target_x / self.ui_scale, card.target_y / self.ui_scale, card.target_angle)
+                for card in self.all_sprites]
+    
+    def save_game(self):
+        self.save_slot = SaveSlot(self.main_menu.selected_save_slot or 1)
+        self.saved_records = self.board_records()
+        self.save_slot.save(self.saved_records, self.rng.seed)
+        self.last_autosave = time.perf_counter()
+    
+    def autosave(self):
+        if self.save_slot is None:
+            return
+        records = self.board_records()
+        changes = {index: fields for index, fields in enumerate(records)
+                   if index >= len(self.saved_records) or fields != self.saved_records[index]}
+        self.save_slot.append_changes(changes)
+        self.saved_records = records
+        self.last_autosave = time.perf_counter()
+    
+    def apply_save(self, slot: int, data: SaveData):
+        """Replace the board with the cards of a loaded save"""
+        with data:
+            self.rng = set_rng_service(RngService(data.seed))
+            for card in list(self.all_sprites):
+                self.input_dispatcher.remove(card)
+                self.layout.remove(card)
+                if self.card_renderer is not None:
+                    self.card_renderer.remove(card)
+                card.release()
+            self.all_sprites.clear()
+            for model, (x, y, angle) in data:
+                position = (x * self.ui_scale, y * self.ui_scale)
+                card = self.add_card(Cards.from_model(model, position, self.card_size(), face_image=CARD_FACE))
+                card.set_rotation(angle, smooth=False)
+            self.save_slot = SaveSlot(slot)
+            self.saved_records = self.board_records()
+        self.deal_hand()
+        print(f"Match seed: {self.rng.seed}")
         
-    def run(self):
-        while self.running:
-            dt = self.clock.tick(64) / 100.0
-            events = pygame.event.get()
-            for event in events:
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    sys.exit()
-                elif event.type == pygame.VIDEORESIZE:
-                    self.screenWidth, self.screenHeight = event.w, event.h
-                    self.screen = pygame.display.set_mode((self.screenWidth, self.screenHeight), pygame.RESIZABLE)
-                    self.background_surface = pygame.transform.scale(self.background_surface, (self.screenWidth, self.screenHeight))
-                    on_resize(screen=self.screen, main_menu=self.main_menu, pause_menu=self.pause_menu)
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        if self.main_menu.play:
-                            self.pause_menu.resume_game = not(self.pause_menu.resume_game)
-                # cards
-                for cards in self.all_sprites:
-                    cards.handle_event(event)
+    def frame(self):
+        """Handle events, step and present one frame"""
+        profiler = self.profiler
+        profiler.begin_frame()
+        if not self.uncapped:
+            self.loop.set_frame_cap(self.settings['frame_rate'])
+        self.loop.tick()
+        profiler.mark("idle")
+        frame_counters.begin_frame()
+        events = pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
+                sys.exit()
+            elif event.type == pygame.VIDEORESIZE:
+                # a window drag sends many resize events, the layouts are rebuilt once per frame
+                self.screenWidth, self.screenHeight = event.w, event.h
+                self.pending_resize = True
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    if self.main_menu is not None and self.main_menu.play:
+                        self.pause_menu.resume_game = not(self.pause_menu.resume_game)
+                elif event.key == pygame.K_F3:
+                    self.toggle_profiler()
+        if self.pending_resize:
+            self.apply_resize()
+        profiler.mark("events")
+        dirty_rects = None
+        if self.loading:
+            self.loader.poll()
+            self.loading_screen.set_progress(*self.loader.progress)
+            self.loading_screen.loading_menu.update(events)
+            self.loading_screen.loading_menu.draw(self.screen)
+            self.loop.reset_accumulator()
+            self.loading = not self.loader.done
+            profiler.mark("menu")
+        else:
+            if not self.loader.done:
+                # work queued after loading, e.g. card faces for a new window size, streams in without a loading screen
+                self.loader.poll(budget=0.004)
             # menu
             if not self.main_menu.play or self.pause_menu.exit_to_main:
                 self.main_menu.play = False
                 self.pause_menu.reset_flags()
                 self.main_menu.main_menu.update(events)
                 self.main_menu.main_menu.draw(self.screen)
+                self.board_visible = False
+                self.loop.reset_accumulator()
+                profiler.mark("menu")
             elif self.main_menu.play and not self.pause_menu.resume_game:
                 self.pause_menu.pause_menu.update(events)
                 self.pause_menu.pause_menu.draw(self.screen)
+                self.board_visible = False
+                self.loop.reset_accumulator()
+                profiler.mark("menu")
             else:
-                self.screen.blit(self.background_surface, (0, 0))
-                # self.all_sprites.update(dt)
-                for cards in self.all_sprites:
-                    cards.update(dt)
-                    cards.draw(screen=self.screen)
-                    
-            self.clock.tick(64)
+                if self.main_menu.loaded_save is not None:
+                    self.apply_save(self.main_menu.selected_save_slot, self.main_menu.loaded_save)
+                    self.main_menu.loaded_save = None
+                elif time.perf_counter() - self.last_autosave >= AUTOSAVE_INTERVAL:
+                    self.autosave()
+                # cards, only the cards under the pointer receive hover/select/drag
+                self.input_dispatcher.dispatch(events)
+                self.layout.step()
+                # card movement, easing and animations run on the fixed timestep, tweens after the easing
+                for step_dt in self.loop.steps():
+                    card_store.step(step_dt)
+                    animations.tick(step_dt)
+                profiler.mark("update")
+                alpha = self.loop.alpha
+                if self.card_renderer is not None:
+                    # a menu covered the board, repaint it once before going back to dirty rects
+                    if not self.board_visible:
+                        self.card_renderer.repaint()
+                    dirty_rects = self.card_renderer.draw(self.screen, alpha)
+                else:
+                    self.screen.blit(self.background_surface, (0, 0))
+                    frame_counters.increment("blits")
+                    for cards in self.all_sprites:
+                        cards.draw(screen=self.screen, alpha=alpha)
+                self.board_visible = True
+                profiler.mark("draw")
+        if profiler.enabled:
+            overlay_rect = self.profiler_overlay.draw(self.screen)
+            if dirty_rects is not None:
+                dirty_rects = list(dirty_rects) + [overlay_rect]
+            profiler.mark("draw")
+        if dirty_rects is not None:
+            pygame.display.update(dirty_rects)
+        else:
             pygame.display.flip()
-            pygame.display.update()
-        pygame.quit()
+        profiler.mark("flip")
+        profiler.end_frame()
+    
+    def toggle_profiler(self):
+        """F3: per-phase timings and the frame-time overlay"""
+        if self.profiler.toggle() and self.profiler_overlay is None:
+            self.profiler_overlay = ProfilerOverlay(self.profiler)
+        # the dirty renderer does not know about the overlay, repaint the board once it is hidden
+        self.board_visible = False
+    
+    def apply_resize(self):
+        self.pending_resize = False
+        self.screen = pygame.display.set_mode((self.screenWidth, self.screenHeight), pygame.RESIZABLE)
+        # the background is built again at the new size, scaling the old one loses quality every time
+        self.background_surface = self.build_background()
+        on_resize(screen=self.screen, main_menu=self.main_menu, pause_menu=self.pause_menu, loading_screen=self.loading_screen)
+        if self.card_renderer is not None:
+            self.card_renderer.set_background(self.background_surface)
+        ui_scale = layout_scale((self.screenWidth, self.screenHeight))
+        if ui_scale != self.ui_scale:
+            ratio = ui_scale / self.ui_scale
+            self.ui_scale = ui_scale
+            # positions follow right away, faces are rendered at the new size a few cards per frame
+            self.loader.call_soon(self.preload_card_images)
+            for card in self.all_sprites:
+                # moves in flight jump to their end, their start positions belong to the old size
+                animations.cancel(card, "move", finish=True)
+                animations.cancel(card, "rotate", finish=True)
+                card.scale_position(ratio)
+                self.loader.call_soon(card.set_scale, self.card_size())
+            self.loader.call_soon(self.deal)
+        self.layout.set_bounds((0, 0, self.screenWidth, self.screenHeight))
+    
+    def build_background(self) -> pygame.Surface:
+        background = pygame.Surface((self.screenWidth, self.screenHeight)).convert()
+        background.fill(pygame.Color("black"))
+        return background
+    
+    def run(self):
+        try:
+            while self.running:
+                self.frame()
+        finally:
+            trace = self.profiler.dump(self.profile_trace)
+            if trace is not None:
+                print(f"Frame profile written to {trace}")
+            self.loader.shutdown()
+            pygame.quit()
         sys.exit()
             
 if __name__ == "__main__":
-    app = Application()
+    seed = int(sys.argv[sys.argv.index("--seed") + 1]) if "--seed" in sys.argv else None
+    profile_trace = sys.argv[sys.argv.index("--profile-trace") + 1] if "--profile-trace" in sys.argv else "frame_profile.csv"
+    app = Application(dirty_rendering="--dirty-rects" in sys.argv, uncapped="--uncapped" in sys.argv, seed=seed,
+                      profile="--profile" in sys.argv, profile_trace=profile_trace)
     app.run()
@@ -107,22 +107,23 @@ class Cards(Standard_Cards):
         # Update collision rect
         self.rect.center = (int(self.x), int(self.y))
         
-pygame.init()
-clock = pygame.time.Clock()
-screenWidth, screenHeight = 600, 600
-screen = pygame.display.set_mode((screenWidth, screenHeight), pygame.RESIZABLE)
-card = Cards(position=(100, 100), scale=(100 ,125), face_image="Assets\cardFront.png")
+if __name__ == "__main__":
+    pygame.init()
+    clock = pygame.time.Clock()
+    screenWidth, screenHeight = 600, 600
+    screen = pygame.display.set_mode((screenWidth, screenHeight), pygame.RESIZABLE)
+    card = Cards(position=(100, 100), scale=(100 ,125), face_image="Assets\cardFront.png")
 
-running = True
-while running:
-    events = pygame.event.get()
-    for event in events:
-        if event.type == pygame.QUIT:
-            running = False
-            sys.exit()
+    running = True
+    while running:
+        events = pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+                sys.exit()
     
-    screen.fill(pygame.Color('white'))
-    card.draw(screen=screen)
-    clock.tick(64)
-    pygame.display.flip()
-    pygame.display.update()
\ No newline at end of file
+        screen.fill(pygame.Color('white'))
+        card.draw(screen=screen)
+        clock.tick(64)
+        pygame.display.flip()
+        pygame.display.update()
\ No newline at end of file